@@ -140,7 +140,11 @@ class AgendamentoController:
             }
 
     @staticmethod
-    def listar_horarios_disponiveis(data_str: str, aluno_id: Optional[int] = None) -> dict:
+    def listar_horarios_disponiveis(
+        data_str: str,
+        aluno_id: Optional[int] = None,
+        paciente_id: Optional[int] = None
+    ) -> dict:
 
         try:
             # Converter string para datetime
@@ -148,7 +152,7 @@ class AgendamentoController:
             data = datetime(int(ano), int(mes), int(dia))
             
             # Obter horários disponíveis
-            horarios = agendamento_service.listar_horarios_disponiveis(data, aluno_id)
+            horarios = agendamento_service.listar_horarios_disponiveis(data, aluno_id, paciente_id)
             
             if not horarios:
                 return {
@@ -176,6 +180,40 @@ class AgendamentoController:
                 "data": []
             }
 
+    @staticmethod
+    def listar_horarios_disponiveis_periodo(
+        data_inicio_str: str,
+        data_fim_str: str,
+        aluno_id: int
+    ) -> dict:
+        """Horários disponíveis do aluno em cada dia útil do período (DD/MM/AAAA, inclusivo)."""
+        try:
+            data_inicio = datetime.strptime(data_inicio_str, "%d/%m/%Y").date()
+            data_fim = datetime.strptime(data_fim_str, "%d/%m/%Y").date()
+            
+            horarios_por_dia = agendamento_service.listar_horarios_disponiveis_periodo(
+                aluno_id, data_inicio, data_fim
+            )
+            
+            return {
+                "success": True,
+                "message": f"Horários disponíveis para {len(horarios_por_dia)} dia(s) útil(eis).",
+                "data": horarios_por_dia
+            }
+        
+        except ValueError as e:
+            return {
+                "success": False,
+                "message": f"Formato de data inválido: {str(e)}",
+                "data": {}
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Erro ao listar horários: {str(e)}",
+                "data": {}
+            }
+
     @staticmethod
     def obter_dados_paciente(paciente_id: int) -> dict:
 
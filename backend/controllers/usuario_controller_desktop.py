@@ -20,7 +20,7 @@ from ..repositories.usuario_repository import (
     list_users_sync,
     list_users_with_details_sync,
     get_user_by_id_sync,
-    get_user_by_email_sync,
+    email_exists_sync,
     get_user_by_cpf_sync,
     get_user_by_matricula_sync,
     update_user_sync,
@@ -31,7 +31,6 @@ from ..repositories.usuario_repository import (
 )
 from ..repositories.sync_helpers import (
     update_user_sync_direct,
-    get_user_by_email_sync_direct,
     get_user_by_id_sync_direct
 )
 
@@ -39,6 +38,12 @@ from ..repositories.sync_helpers import (
 MSG_ID_INVALIDO = "ID do usuário deve ser um número positivo"
 MSG_USUARIO_NAO_ENCONTRADO = "Usuário não encontrado"
 
+# Padrões das validações, compilados uma única vez no import do módulo
+_CPF_NAO_DIGITOS = re.compile(r'\D')
+_PW_HAS_ALPHA = re.compile(r'[a-zA-Z]')
+_PW_HAS_DIGIT = re.compile(r'\d')
+_EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 # Tipos de usuário disponíveis
 TIPOS_USUARIO = {
     "administrador": Administrador,
@@ -112,7 +117,7 @@ class UsuarioController:
         Regra de negócio: CPF deve ser válido conforme algoritmo padrão.
         """
         # Remove caracteres não numéricos
-        cpf_numbers = re.sub(r'\D', '', cpf)
+        cpf_numbers = _CPF_NAO_DIGITOS.sub('', cpf)
         
         # Verifica se tem 11 dígitos
         if len(cpf_numbers) != 11:
@@ -146,9 +151,9 @@ class UsuarioController:
         """
         if len(senha) < 8:
             raise ValueError("Senha deve ter pelo menos 8 caracteres")
-        if not re.search(r'[a-zA-Z]', senha):
+        if not _PW_HAS_ALPHA.search(senha):
             raise ValueError("Senha deve conter pelo menos uma letra")
-        if not re.search(r'\d', senha):
+        if not _PW_HAS_DIGIT.search(senha):
             raise ValueError("Senha deve conter pelo menos um dígito")
         return True
 
@@ -158,8 +163,7 @@ class UsuarioController:
         Valida formato do email.
         Regra de negócio: deve ser um email válido.
         """
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
+        if not _EMAIL_PATTERN.match(email):
             raise ValueError("Formato de email inválido")
         return True
 
@@ -198,8 +202,7 @@ class UsuarioController:
             UsuarioController.validate_password_policy(senha)
 
             # Verificar se email já existe (regra de negócio)
-            existing_user = get_user_by_email_sync(email)
-            if existing_user:
+            if email_exists_sync(email):
                 raise ValueError(f"Email {email} já está cadastrado no sistema")
 
             # Verificar se CPF já existe (regra de negócio)
@@ -320,10 +323,7 @@ class UsuarioController:
 
             if email is not None:
                 UsuarioController.validate_email_format(email)
-                # Verificar se email já está em uso por outro usuário (acesso direto ao SQLite)
-                email_user = get_user_by_email_sync_direct(email)
-                if email_user and email_user['id'] != user_id:
-                    raise ValueError(f"Email {email} já está em uso por outro usuário")
+                # Email em uso por outro usuário é verificado na própria transação de atualização
 
             # Validar tipo de usuário se fornecido
             if tipo_usuario is not None:
@@ -344,7 +344,7 @@ class UsuarioController:
                     "id": updated_user['id'],
                     "nome": updated_user['nome'],
                     "email": updated_user['email'],
-                    "tipo_usuario": updated_user['tipo'].lower(),
+                    "tipo_usuario": updated_user['tipo_usuario'],
                     "ativo": True  # Por padrão, retornar como ativo
                 },
                 "message": f"Usuário '{updated_user['nome']}' atualizado com sucesso"
@@ -0,0 +1,41 @@
+"""
+Cache em memória com expiração - CliniSys Desktop
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CacheTTL:
+    """Cache em memória com expiração por tempo e tamanho máximo (thread-safe)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._dados: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave: Any) -> Optional[Any]:
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em < time.monotonic():
+                del self._dados[chave]
+                return None
+            return valor
+
+    def set(self, chave: Any, valor: Any) -> None:
+        with self._lock:
+            if len(self._dados) >= self._maxsize and chave not in self._dados:
+                # Descarta a entrada mais antiga (dict preserva ordem de inserção)
+                del self._dados[next(iter(self._dados))]
+            self._dados[chave] = (time.monotonic() + self._ttl, valor)
+
+    def pop(self, chave: Any) -> None:
+        with self._lock:
+            self._dados.pop(chave, None)
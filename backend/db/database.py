@@ -18,10 +18,34 @@ async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
 
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DB_SYNC_PATH = os.path.join(_REPO_ROOT, 'desktop', 'clinisys_uc_admin.db')
+_wal_configurado = False
+
+
+def conectar_sqlite(**kwargs) -> sqlite3.Connection:
+    """
+    Abre uma conexão síncrona SQLite com a configuração padrão do desktop.
+    Argumentos extras são repassados para sqlite3.connect.
+    """
+    global _wal_configurado
+    conn = sqlite3.connect(DB_SYNC_PATH, cached_statements=256, **kwargs)
+    
+    # journal_mode=WAL fica gravado no arquivo: basta configurar uma vez por processo
+    if not _wal_configurado:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_configurado = True
+    
+    # Pragmas abaixo valem por conexão
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+
 def get_db_sync():
     """
     Retorna conexão síncrona SQLite para uso no desktop.
     """
-    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    db_path = os.path.join(repo_root, 'desktop', 'clinisys_uc_admin.db')
-    return sqlite3.connect(db_path)
+    return conectar_sqlite()
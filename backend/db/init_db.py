@@ -2,12 +2,15 @@
 Inicialização do banco de dados - CliniSys Desktop
 """
 
-import asyncio
+import logging
 from sqlalchemy import text
 
 from .database import engine, AsyncSessionLocal
+from .runner import run_async
 from ..models.usuario import UsuarioSistema
 
+logger = logging.getLogger(__name__)
+
 
 async def create_tables():
     """Cria as tabelas do banco de dados."""
@@ -18,6 +21,74 @@ async def create_tables():
         # Criar todas as tabelas baseadas nos modelos
         from .database import Base
         await conn.run_sync(Base.metadata.create_all)
+        
+        # create_all só cria índices junto com tabelas novas; garantir também em bancos já existentes.
+        # email/cpf (usuarios_sistema) e matricula (alunos) já são únicos e indexados pelo próprio schema;
+        # lower(email) ganha índice funcional para as buscas por email sem diferenciar maiúsculas.
+        await conn.execute(text(
+            'CREATE INDEX IF NOT EXISTS "ix_pacientes_statusAtendimento" ON pacientes ("statusAtendimento")'
+        ))
+        
+        # Emails gravados antes da normalização passam para a forma canônica (lower/trim),
+        # exceto os que colidiriam com outra conta; esses ficam como estão até serem resolvidos.
+        # Com o índice único já criado a normalização foi concluída: nada a varrer na inicialização
+        if not await _indice_existe(conn, "ux_usuarios_sistema_email_lower"):
+            await conn.execute(text("""
+                UPDATE usuarios_sistema
+                SET email = lower(trim(email))
+                WHERE email <> lower(trim(email))
+                  AND NOT EXISTS (
+                      SELECT 1 FROM usuarios_sistema outro
+                      WHERE outro.id <> usuarios_sistema.id
+                        AND lower(trim(outro.email)) = lower(trim(usuarios_sistema.email))
+                  )
+            """))
+        await _criar_indice_unico(
+            conn, "ux_usuarios_sistema_email_lower", "ix_usuarios_sistema_email_lower",
+            tabela="usuarios_sistema", colunas="lower(email)", onde="email IS NOT NULL",
+        )
+        
+        # Um aluno/paciente por horário (NULL = aluno/paciente excluído, fica de fora da regra)
+        await _criar_indice_unico(
+            conn, "ux_atend_aluno_dt", "ix_atend_aluno_dt",
+            tabela="atendimentos", colunas='aluno_id, "dataHora"', onde="aluno_id IS NOT NULL",
+        )
+        await _criar_indice_unico(
+            conn, "ux_atend_paciente_dt", "ix_atend_paciente_dt",
+            tabela="atendimentos", colunas='paciente_id, "dataHora"', onde="paciente_id IS NOT NULL",
+        )
+
+
+async def _indice_existe(conn, nome: str) -> bool:
+    """Indica se o índice já está registrado em sqlite_master."""
+    existe = await conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :nome"), {"nome": nome}
+    )
+    return existe.first() is not None
+
+
+async def _criar_indice_unico(conn, nome: str, nome_alternativo: str, *, tabela: str, colunas: str, onde: str) -> None:
+    """
+    Cria o índice único em bancos já existentes. Se os dados gravados ainda tiverem
+    duplicatas, o CREATE UNIQUE INDEX falharia: nesse caso cria um índice comum
+    (nome_alternativo) e registra um aviso; a criação é tentada de novo na próxima inicialização.
+    """
+    if await _indice_existe(conn, nome):
+        return
+    
+    duplicado = await conn.execute(text(
+        f"SELECT 1 FROM {tabela} WHERE {onde} GROUP BY {colunas} HAVING COUNT(*) > 1 LIMIT 1"
+    ))
+    if duplicado.first() is None:
+        await conn.execute(text(f"CREATE UNIQUE INDEX {nome} ON {tabela} ({colunas})"))
+        await conn.execute(text(f"DROP INDEX IF EXISTS {nome_alternativo}"))
+        return
+    
+    logger.warning(
+        "Registros duplicados em %s (%s): índice único %s não criado; usando índice comum %s",
+        tabela, colunas, nome, nome_alternativo,
+    )
+    await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {nome_alternativo} ON {tabela} ({colunas})"))
 
 
 async def check_database():
@@ -33,21 +104,9 @@ async def check_database():
 
 def create_tables_sync():
     """Versão síncrona para criar tabelas."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(create_tables())
+    return run_async(create_tables())
 
 
 def check_database_sync():
     """Versão síncrona para verificar banco."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(check_database())
\ No newline at end of file
+    return run_async(check_database())
\ No newline at end of file
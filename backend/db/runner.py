@@ -0,0 +1,27 @@
+"""
+Execução síncrona de corrotinas - CliniSys Desktop
+Um único event loop de background compartilhado por todos os wrappers síncronos
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+# Loop dedicado, rodando em uma thread de background durante toda a vida do processo.
+# Evita criar e destruir um loop (asyncio.run) a cada chamada vinda da interface e
+# funciona mesmo quando a thread chamadora não tem (ou já tem) um loop próprio.
+_LOOP = asyncio.new_event_loop()
+_THREAD = threading.Thread(target=_LOOP.run_forever, name="clinisys-db-loop", daemon=True)
+_THREAD.start()
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Executa a corrotina no loop de background e aguarda o resultado de forma síncrona."""
+    if threading.current_thread() is _THREAD:
+        coro.close()
+        raise RuntimeError("run_async não pode ser chamado de dentro do loop de background")
+    return asyncio.run_coroutine_threadsafe(coro, _LOOP).result()
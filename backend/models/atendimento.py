@@ -1,5 +1,5 @@
 
-from sqlalchemy import String, Integer, ForeignKey, DateTime, Text
+from sqlalchemy import String, Integer, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..db.database import Base
 from datetime import datetime
@@ -40,5 +40,13 @@ class Atendimento(Base):
     )
     paciente: Mapped["Paciente | None"] = relationship("Paciente", back_populates="atendimentos")
     
+    # Um aluno/paciente não pode ter dois atendimentos no mesmo horário.
+    # O banco garante a regra de forma atômica (sem corrida entre verificação e INSERT);
+    # em bancos já existentes os índices são criados por init_db.create_tables.
+    __table_args__ = (
+        Index("ux_atend_aluno_dt", "aluno_id", "dataHora", unique=True),
+        Index("ux_atend_paciente_dt", "paciente_id", "dataHora", unique=True),
+    )
+    
     def __repr__(self):
         return f"<Atendimento(id={self.id}, tipo='{self.tipo}', status='{self.status}')>"
\ No newline at end of file
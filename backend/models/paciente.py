@@ -20,7 +20,7 @@ class Paciente(Base):
     cpf: Mapped[str] = mapped_column(String(11), unique=True, nullable=False, index=True)
     nome: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
     dataNascimento: Mapped[date] = mapped_column(Date, nullable=False)
-    statusAtendimento: Mapped[str] = mapped_column(String(50), nullable=False, default="Aguardando Triagem", server_default="Aguardando Triagem")
+    statusAtendimento: Mapped[str] = mapped_column(String(50), nullable=False, default="Aguardando Triagem", server_default="Aguardando Triagem", index=True)
     clinica_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("clinicas.id"), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -28,4 +28,7 @@ class Paciente(Base):
     # Relacionamentos conforme diagrama
     clinica: Mapped[Optional["Clinica"]] = relationship("Clinica", back_populates="pacientes")
     atendimentos: Mapped[List["Atendimento"]] = relationship("Atendimento", back_populates="paciente")
-    prontuario: Mapped[Optional["Prontuario"]] = relationship("Prontuario", back_populates="paciente", uselist=False)
\ No newline at end of file
+    prontuario: Mapped[Optional["Prontuario"]] = relationship("Prontuario", back_populates="paciente", uselist=False)
+
+    # Busca created_at/updated_at gerados pelo banco via RETURNING no próprio INSERT/UPDATE
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
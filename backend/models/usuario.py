@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import enum
 from datetime import datetime
-from sqlalchemy import String, Boolean, Integer, DateTime, func
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Boolean, Integer, DateTime, CheckConstraint, Index, func
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from ..db.database import Base
 
@@ -28,10 +28,28 @@ class UsuarioSistema(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
-    # Discriminador para herança
-    tipo_usuario: Mapped[str] = mapped_column(String(50), nullable=False)
+    # Discriminador para herança (sempre gravado na forma canônica, em minúsculas)
+    tipo_usuario: Mapped[str] = mapped_column(
+        String(50),
+        CheckConstraint(
+            "tipo_usuario IN ('aluno', 'professor', 'recepcionista', 'administrador')",
+            name="ck_usuarios_sistema_tipo_usuario"
+        ),
+        nullable=False
+    )
     
     __mapper_args__ = {
         "polymorphic_on": tipo_usuario,
-        "polymorphic_identity": "usuario_base"
+        "polymorphic_identity": "usuario_base",
+        "eager_defaults": True  # created_at/updated_at voltam no próprio INSERT/UPDATE (RETURNING)
     }
+    
+    # Buscas por email comparam lower(email): índice funcional único atende a consulta direto
+    __table_args__ = (
+        Index("ux_usuarios_sistema_email_lower", func.lower(email), unique=True),
+    )
+    
+    @validates("email")
+    def _normalizar_email(self, key: str, email: str) -> str:
+        """Email sempre gravado em minúsculas e sem espaços nas bordas."""
+        return email.strip().lower() if email else email
@@ -5,16 +5,46 @@ Camada de acesso a dados pura para operações de agendamento
 
 from __future__ import annotations
 
-import asyncio
+import logging
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, update, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.exc import IntegrityError
 
 from ..models.atendimento import Atendimento
+from ..models.paciente import Paciente
 from ..db.database import AsyncSessionLocal
+from ..db.runner import run_async
+from .sync_helpers import invalidar_paciente_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Colunas usadas pelas telas de listagem; os campos de texto longos
+# (procedimentosRealizados/observacoesPosAtendimento) ficam de fora
+_COLUNAS_LISTAGEM = (
+    Atendimento.id,
+    Atendimento.dataHora,
+    Atendimento.status,
+    Atendimento.tipo,
+    Atendimento.aluno_id,
+    Atendimento.paciente_id,
+)
+
+
+class ConsultaConflictError(Exception):
+    """Horário já ocupado pelo aluno ou pelo paciente (violação de índice único)."""
+
+
+# Mensagens do SQLite para violações de ux_atend_aluno_dt / ux_atend_paciente_dt
+# (o SQLite identifica o índice pelas colunas, não pelo nome)
+_VIOLACOES_HORARIO = (
+    "UNIQUE constraint failed: atendimentos.aluno_id, atendimentos.dataHora",
+    "UNIQUE constraint failed: atendimentos.paciente_id, atendimentos.dataHora",
+)
 
 
 class ConsultaRepository:
@@ -105,8 +135,6 @@ class ConsultaRepository:
         Returns:
             Lista de objetos datetime com os horários ocupados
         """
-        from sqlalchemy import func, cast, Date
-        
         data_apenas = data.date()
         
         stmt = select(Atendimento.dataHora).where(
@@ -117,23 +145,84 @@ class ConsultaRepository:
         )
         
         result = await db.execute(stmt)
-        horarios = result.scalars().all()
+        return result.scalars().all()
+
+    @staticmethod
+    async def listar_horarios_ocupados_por_aluno_no_periodo(
+        db: AsyncSession,
+        aluno_id: int,
+        data_inicio: date,
+        data_fim: date
+    ) -> list[datetime]:
+        """
+        Lista, em uma única consulta, os horários ocupados por um aluno entre
+        data_inicio e data_fim (ambas inclusivas).
         
-        return list(horarios)
+        Returns:
+            Lista de datetimes ocupados no período
+        """
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim, datetime.min.time()) + timedelta(days=1)
+        
+        stmt = select(Atendimento.dataHora).where(
+            and_(
+                Atendimento.aluno_id == aluno_id,
+                Atendimento.dataHora >= inicio,
+                Atendimento.dataHora < fim
+            )
+        )
+        
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    async def listar_horarios_ocupados_por_aluno_e_paciente(
+        db: AsyncSession,
+        aluno_id: int,
+        paciente_id: int,
+        data: datetime
+    ) -> set[datetime]:
+        """
+        Lista, em uma única consulta, os horários do dia ocupados pelo aluno OU pelo paciente.
+        
+        Returns:
+            Conjunto de datetimes ocupados (verificação de slot em O(1))
+        """
+        inicio = datetime.combine(data.date(), datetime.min.time())
+        fim = inicio + timedelta(days=1)
+        
+        stmt = select(Atendimento.dataHora).where(
+            and_(
+                Atendimento.dataHora >= inicio,
+                Atendimento.dataHora < fim,
+                or_(
+                    Atendimento.aluno_id == aluno_id,
+                    Atendimento.paciente_id == paciente_id
+                )
+            )
+        )
+        
+        result = await db.execute(stmt)
+        return set(result.scalars().all())
 
     @staticmethod
     async def salvar(db: AsyncSession, atendimento: Atendimento) -> Atendimento:
         """
         Salva um novo atendimento no banco de dados.
+        
+        Raises:
+            ConsultaConflictError: Se o aluno ou o paciente já tiver atendimento no horário
         """
         try:
             db.add(atendimento)
             await db.commit()
-            await db.refresh(atendimento)
             return atendimento
         except IntegrityError as e:
             await db.rollback()
-            raise Exception(f"Erro ao salvar atendimento: {str(e)}")
+            # Só conflitos de horário viram ConsultaConflictError; FK, NOT NULL etc. seguem como estão
+            if str(e.orig) in _VIOLACOES_HORARIO:
+                raise ConsultaConflictError() from e
+            raise
 
     @staticmethod
     async def get_by_id(db: AsyncSession, atendimento_id: int) -> Optional[Atendimento]:
@@ -145,22 +234,31 @@ class ConsultaRepository:
     @staticmethod
     async def listar_por_aluno(db: AsyncSession, aluno_id: int) -> list[Atendimento]:
         """Lista todos os atendimentos de um aluno."""
-        stmt = select(Atendimento).where(Atendimento.aluno_id == aluno_id)
+        stmt = (
+            select(Atendimento)
+            .options(load_only(*_COLUNAS_LISTAGEM))
+            .where(Atendimento.aluno_id == aluno_id)
+        )
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     @staticmethod
     async def listar_por_paciente(db: AsyncSession, paciente_id: int) -> list[Atendimento]:
         """Lista todos os atendimentos de um paciente."""
-        stmt = select(Atendimento).where(Atendimento.paciente_id == paciente_id)
+        stmt = (
+            select(Atendimento)
+            .options(load_only(*_COLUNAS_LISTAGEM))
+            .where(Atendimento.paciente_id == paciente_id)
+        )
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     @staticmethod
     async def listar_agendados_por_aluno(db: AsyncSession, aluno_id: int) -> list[Atendimento]:
         """Lista atendimentos com status 'Agendado' para um aluno."""
         stmt = (
             select(Atendimento)
+            .options(load_only(*_COLUNAS_LISTAGEM))
             .where(
                 and_(
                     Atendimento.aluno_id == aluno_id,
@@ -170,7 +268,7 @@ class ConsultaRepository:
             .order_by(Atendimento.dataHora.asc())
         )
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     @staticmethod
     async def listar_concluidos_por_aluno(db: AsyncSession, aluno_id: int) -> list[Atendimento]:
@@ -186,7 +284,7 @@ class ConsultaRepository:
             .order_by(Atendimento.dataHora.desc())
         )
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     @staticmethod
     async def registrar_procedimentos(
@@ -208,7 +306,41 @@ class ConsultaRepository:
         atendimento.status = "Concluído"
 
         await db.commit()
-        await db.refresh(atendimento)
+        return atendimento
+
+    @staticmethod
+    async def registrar_procedimentos_e_concluir(
+        db: AsyncSession,
+        atendimento_id: int,
+        procedimentos: str,
+        observacoes: str | None
+    ) -> Atendimento | None:
+        """
+        Registra os procedimentos do atendimento e marca o paciente como
+        'Atendimento Concluído' na mesma transação (um único commit).
+        """
+        stmt = select(Atendimento).where(Atendimento.id == atendimento_id)
+        result = await db.execute(stmt)
+        atendimento = result.scalar_one_or_none()
+
+        if atendimento is None:
+            return None
+
+        atendimento.procedimentosRealizados = procedimentos
+        atendimento.observacoesPosAtendimento = observacoes
+        atendimento.status = "Concluído"
+
+        if atendimento.paciente_id is not None:
+            await db.execute(
+                update(Paciente)
+                .where(Paciente.id == atendimento.paciente_id)
+                .values(statusAtendimento="Atendimento Concluído")
+            )
+
+        await db.commit()
+
+        if atendimento.paciente_id is not None:
+            invalidar_paciente_cache(atendimento.paciente_id)
         return atendimento
 
     @staticmethod
@@ -221,40 +353,46 @@ class ConsultaRepository:
         Verifica se o paciente já tem algum agendamento no dia especificado.
         Retorna True se já existe agendamento, False caso contrário.
         """
-        from sqlalchemy import func, cast, Date
-        
         # Extrair apenas a data (sem horário) para comparação
         data_apenas = data.date()
         
-        print(f"[DEBUG] Verificando agendamentos para paciente_id={paciente_id}, data={data_apenas}")
-        
         # Forçar leitura direta do banco (sem cache)
         await db.flush()  # Garante que todas as mudanças pendentes sejam escritas
         
-        # Debug: Listar TODOS os atendimentos deste paciente
-        stmt_debug = select(Atendimento).where(Atendimento.paciente_id == paciente_id)
-        result_debug = await db.execute(stmt_debug)
-        todos_atendimentos = result_debug.scalars().all()
-        print(f"[DEBUG] Total de atendimentos do paciente {paciente_id}: {len(todos_atendimentos)}")
-        for atend in todos_atendimentos:
-            print(f"  - ID {atend.id}: {atend.dataHora} (data: {atend.dataHora.date()})")
+        # Diagnóstico (consulta extra) apenas com o nível DEBUG habilitado
+        if logger.isEnabledFor(logging.DEBUG):
+            stmt_debug = select(Atendimento).where(Atendimento.paciente_id == paciente_id)
+            result_debug = await db.execute(stmt_debug)
+            todos_atendimentos = result_debug.scalars().all()
+            logger.debug(
+                "Verificando agendamentos para paciente_id=%s, data=%s: %s atendimento(s) no total",
+                paciente_id, data_apenas, len(todos_atendimentos)
+            )
+            for atend in todos_atendimentos:
+                logger.debug("  - ID %s: %s", atend.id, atend.dataHora)
         
-        # Consulta para verificar se já existe atendimento no mesmo dia
-        # Usando Date do SQLite diretamente para garantir comparação correta
-        stmt = select(func.count(Atendimento.id)).where(
-            and_(
-                Atendimento.paciente_id == paciente_id,
-                func.date(Atendimento.dataHora) == data_apenas
+        # Intervalo [início do dia, início do dia seguinte): consulta de faixa sobre o
+        # índice (paciente_id, dataHora), parando no primeiro atendimento encontrado
+        inicio_dia = datetime.combine(data_apenas, datetime.min.time())
+        fim_dia = inicio_dia + timedelta(days=1)
+        stmt = (
+            select(Atendimento.id)
+            .where(
+                and_(
+                    Atendimento.paciente_id == paciente_id,
+                    Atendimento.dataHora >= inicio_dia,
+                    Atendimento.dataHora < fim_dia
+                )
             )
+            .limit(1)
         )
         
         result = await db.execute(stmt)
-        count = result.scalar()
+        tem_agendamento = result.scalar_one_or_none() is not None
         
-        print(f"[DEBUG] Encontrados {count} agendamentos no dia {data_apenas}")
+        logger.debug("Agendamento no dia %s: %s", data_apenas, tem_agendamento)
         
-        # Retorna True se count > 0 (já tem agendamento)
-        return count > 0
+        return tem_agendamento
 
 
 # ===================== Versões Síncronas para Desktop ===================== #
@@ -265,19 +403,13 @@ def verificar_disponibilidade_sync(
     data_hora: datetime
 ) -> bool:
     """Versão síncrona de verificar_disponibilidade."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> bool:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.verificar_disponibilidade(
                 db, aluno_id, paciente_id, data_hora
             )
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def verificar_conflito_detalhado_sync(
@@ -286,79 +418,49 @@ def verificar_conflito_detalhado_sync(
     data_hora: datetime
 ) -> dict:
     """Versão síncrona de verificar_conflito_detalhado."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> dict:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.verificar_conflito_detalhado(
                 db, aluno_id, paciente_id, data_hora
             )
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def salvar_sync(atendimento: Atendimento) -> Atendimento:
     """Versão síncrona de salvar."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> Atendimento:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.salvar(db, atendimento)
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def get_by_id_sync(atendimento_id: int) -> Optional[Atendimento]:
     """Versão síncrona de get_by_id."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> Optional[Atendimento]:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.get_by_id(db, atendimento_id)
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def listar_por_aluno_sync(aluno_id: int) -> list[Atendimento]:
     """Versão síncrona de listar_por_aluno."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> list[Atendimento]:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.listar_por_aluno(db, aluno_id)
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def listar_por_paciente_sync(paciente_id: int) -> list[Atendimento]:
     """Versão síncrona de listar_por_paciente."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> list[Atendimento]:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.listar_por_paciente(db, paciente_id)
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def verificar_paciente_tem_agendamento_no_dia_sync(
@@ -366,19 +468,13 @@ def verificar_paciente_tem_agendamento_no_dia_sync(
     data: datetime
 ) -> bool:
     """Versão síncrona de verificar_paciente_tem_agendamento_no_dia."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> bool:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.verificar_paciente_tem_agendamento_no_dia(
                 db, paciente_id, data
             )
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def listar_horarios_ocupados_por_aluno_sync(
@@ -386,49 +482,61 @@ def listar_horarios_ocupados_por_aluno_sync(
     data: datetime
 ) -> list[datetime]:
     """Versão síncrona de listar_horarios_ocupados_por_aluno."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> list[datetime]:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.listar_horarios_ocupados_por_aluno(
                 db, aluno_id, data
             )
     
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    return run_async(_async_wrapper())
+
+
+def listar_horarios_ocupados_por_aluno_no_periodo_sync(
+    aluno_id: int,
+    data_inicio: date,
+    data_fim: date
+) -> list[datetime]:
+    """Versão síncrona de listar_horarios_ocupados_por_aluno_no_periodo."""
+    async def _async_wrapper() -> list[datetime]:
+        async with AsyncSessionLocal() as db:
+            return await ConsultaRepository.listar_horarios_ocupados_por_aluno_no_periodo(
+                db, aluno_id, data_inicio, data_fim
+            )
+    
+    return run_async(_async_wrapper())
+
+
+def listar_horarios_ocupados_por_aluno_e_paciente_sync(
+    aluno_id: int,
+    paciente_id: int,
+    data: datetime
+) -> set[datetime]:
+    """Versão síncrona de listar_horarios_ocupados_por_aluno_e_paciente."""
+    async def _async_wrapper() -> set[datetime]:
+        async with AsyncSessionLocal() as db:
+            return await ConsultaRepository.listar_horarios_ocupados_por_aluno_e_paciente(
+                db, aluno_id, paciente_id, data
+            )
     
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def listar_agendados_por_aluno_sync(aluno_id: int) -> list[Atendimento]:
     """Versão síncrona de listar_agendados_por_aluno."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> list[Atendimento]:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.listar_agendados_por_aluno(db, aluno_id)
 
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def listar_concluidos_por_aluno_sync(aluno_id: int) -> list[Atendimento]:
     """Versão síncrona de listar_concluidos_por_aluno."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> list[Atendimento]:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.listar_concluidos_por_aluno(db, aluno_id)
 
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
 
 
 def registrar_procedimentos_sync(
@@ -437,7 +545,7 @@ def registrar_procedimentos_sync(
     observacoes: str | None
 ) -> Atendimento | None:
     """Versão síncrona de registrar_procedimentos."""
-    async def _async_wrapper():
+    async def _async_wrapper() -> Atendimento | None:
         async with AsyncSessionLocal() as db:
             return await ConsultaRepository.registrar_procedimentos(
                 db,
@@ -446,10 +554,22 @@ def registrar_procedimentos_sync(
                 observacoes
             )
 
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    return run_async(_async_wrapper())
+
+
+def registrar_procedimentos_e_concluir_sync(
+    atendimento_id: int,
+    procedimentos: str,
+    observacoes: str | None
+) -> Atendimento | None:
+    """Versão síncrona de registrar_procedimentos_e_concluir."""
+    async def _async_wrapper() -> Atendimento | None:
+        async with AsyncSessionLocal() as db:
+            return await ConsultaRepository.registrar_procedimentos_e_concluir(
+                db,
+                atendimento_id,
+                procedimentos,
+                observacoes
+            )
 
-    return loop.run_until_complete(_async_wrapper())
+    return run_async(_async_wrapper())
@@ -5,7 +5,6 @@ Camada de acesso a dados pura - sem lógica de negócio
 
 from __future__ import annotations
 
-import asyncio
 from typing import List, Optional
 from datetime import date
 
@@ -15,6 +14,8 @@ from sqlalchemy.exc import IntegrityError
 
 from ..models.paciente import Paciente
 from ..db.database import AsyncSessionLocal
+from ..db.runner import run_async
+from .sync_helpers import invalidar_paciente_cache
 
 
 class PacienteRepository:
@@ -26,14 +27,14 @@ class PacienteRepository:
     @staticmethod
     async def get_by_cpf(db: AsyncSession, cpf: str) -> Optional[Paciente]:
         """Busca paciente por CPF."""
-        stmt = select(Paciente).where(Paciente.cpf == cpf)
+        stmt = select(Paciente).where(Paciente.cpf == cpf).limit(1)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
     @staticmethod
     async def get_by_id(db: AsyncSession, patient_id: int) -> Optional[Paciente]:
         """Busca paciente por ID."""
-        stmt = select(Paciente).where(Paciente.id == patient_id)
+        stmt = select(Paciente).where(Paciente.id == patient_id).limit(1)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
@@ -56,7 +57,6 @@ class PacienteRepository:
         
         db.add(patient)
         await db.commit()
-        await db.refresh(patient)
         return patient
 
     @staticmethod
@@ -64,7 +64,7 @@ class PacienteRepository:
         """Lista todos os pacientes."""
         stmt = select(Paciente).order_by(Paciente.nome)
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     @staticmethod
     async def update(
@@ -85,7 +85,7 @@ class PacienteRepository:
             patient.statusAtendimento = status_atendimento
         
         await db.commit()
-        await db.refresh(patient)
+        invalidar_paciente_cache(patient_id)
         return patient
 
     @staticmethod
@@ -97,19 +97,15 @@ class PacienteRepository:
         
         await db.delete(patient)
         await db.commit()
+        invalidar_paciente_cache(patient_id)
         return True
 
 
 # ===================== Funções Síncronas (Desktop Wrappers) ===================== #
 
-def run_async(coro):
-    """Executa função assíncrona de forma síncrona."""
-    # Sempre usar asyncio.run para criar um novo event loop limpo
-    return asyncio.run(coro)
-
 def create_patient_sync(nome: str, cpf: str, data_nascimento: date) -> Paciente:
     """Versão síncrona de create_patient."""
-    async def _create():
+    async def _create() -> Paciente:
         async with AsyncSessionLocal() as db:
             return await PacienteRepository.create(
                 db, 
@@ -123,7 +119,7 @@ def create_patient_sync(nome: str, cpf: str, data_nascimento: date) -> Paciente:
 
 def list_patients_sync() -> List[Paciente]:
     """Versão síncrona de list_patients."""
-    async def _list():
+    async def _list() -> List[Paciente]:
         async with AsyncSessionLocal() as db:
             return await PacienteRepository.list_all(db)
     
@@ -132,7 +128,7 @@ def list_patients_sync() -> List[Paciente]:
 
 def get_patient_by_id_sync(patient_id: int) -> Optional[dict]:
     """Versão síncrona de get_patient_by_id. Retorna dicionário com dados do paciente."""
-    async def _get():
+    async def _get() -> Optional[dict]:
         async with AsyncSessionLocal() as db:
             patient = await PacienteRepository.get_by_id(db, patient_id)
             if patient:
@@ -153,7 +149,7 @@ def get_patient_by_id_sync(patient_id: int) -> Optional[dict]:
 
 def get_patient_by_cpf_sync(cpf: str) -> Optional[Paciente]:
     """Versão síncrona de get_patient_by_cpf."""
-    async def _get():
+    async def _get() -> Optional[Paciente]:
         async with AsyncSessionLocal() as db:
             return await PacienteRepository.get_by_cpf(db, cpf)
     
@@ -166,7 +162,7 @@ def update_patient_sync(
     status_atendimento: Optional[str] = None
 ) -> Optional[Paciente]:
     """Versão síncrona de update_patient."""
-    async def _update():
+    async def _update() -> Optional[Paciente]:
         async with AsyncSessionLocal() as db:
             return await PacienteRepository.update(db, patient_id, nome=nome, status_atendimento=status_atendimento)
     
@@ -175,7 +171,7 @@ def update_patient_sync(
 
 def delete_patient_sync(patient_id: int) -> bool:
     """Versão síncrona de delete_patient."""
-    async def _delete():
+    async def _delete() -> bool:
         async with AsyncSessionLocal() as db:
             return await PacienteRepository.delete_by_id(db, patient_id)
     
@@ -3,110 +3,363 @@ Helpers síncronos para acesso ao banco de dados SQLite
 Evita problemas com asyncio em aplicações Tkinter
 """
 
+import atexit
+import json
 import sqlite3
 import os
-from typing import Optional, Dict, Any
-from datetime import datetime
+import threading
+from typing import Optional, Dict, Any, Iterable
+from datetime import date, datetime, timedelta
+
+from ..core.cache import CacheTTL
+from ..db.database import DB_SYNC_PATH, conectar_sqlite
+
+
+# Colunas declaradas como DATE (ex.: pacientes.dataNascimento) voltam como datetime.date,
+# convertidas pelo sqlite3 durante o fetch
+sqlite3.register_converter("DATE", lambda valor: date.fromisoformat(valor.decode()))
+
+# Uma conexão por thread, reaproveitada entre chamadas (mantém o cache de páginas do SQLite)
+_local = threading.local()
+_conexoes: list = []
+_conexoes_lock = threading.Lock()
+
+# tipo_usuario é gravado em minúsculas (identidade polimórfica); forma de exibição pré-calculada
+_TIPO_EXIBICAO = {
+    'aluno': 'Aluno',
+    'professor': 'Professor',
+    'recepcionista': 'Recepcionista',
+    'administrador': 'Administrador',
+}
+
+
+def _tipo_exibicao(tipo_usuario: str) -> str:
+    """Forma de exibição do tipo; bancos antigos podem ter valores fora da forma canônica."""
+    return _TIPO_EXIBICAO.get(tipo_usuario) or tipo_usuario.capitalize()
+
+
+# Leituras por ID repetidas em sequência (agenda, telas de detalhe) são servidas da memória;
+# os caminhos de escrita chamam invalidar_*_cache para descartar a entrada alterada
+_cache_usuarios = CacheTTL(maxsize=4096, ttl=30)
+_cache_pacientes = CacheTTL(maxsize=4096, ttl=30)
+
+
+def invalidar_usuario_cache(user_id: int) -> None:
+    """Remove o usuário do cache de leituras por ID."""
+    _cache_usuarios.pop(user_id)
+
+
+def invalidar_paciente_cache(patient_id: int) -> None:
+    """Remove o paciente do cache de leituras por ID."""
+    _cache_pacientes.pop(patient_id)
+
+
+# SQL fixo das consultas mais frequentes (mesmo objeto string -> reaproveita o cache de statements)
+_SQL_GET_USER_BY_ID = """
+    SELECT u.id, u.nome, u.cpf, u.email, u.tipo_usuario,
+           COALESCE(a.clinica_id, p.clinica_id) AS clinica_id
+    FROM usuarios_sistema u
+    LEFT JOIN alunos a ON a.id = u.id
+    LEFT JOIN professores p ON p.id = u.id
+    WHERE u.id = ?
+    LIMIT 1
+"""
+
+_SQL_GET_PATIENT_BY_ID = """
+    SELECT id, nome, cpf, dataNascimento, statusAtendimento, clinica_id
+    FROM pacientes
+    WHERE id = ?
+    LIMIT 1
+"""
+
+# Contexto de validação de um agendamento em um único comando: aluno, paciente
+# (LEFT JOIN: ausentes voltam como NULL) e se o paciente já tem atendimento no dia.
+# O dia é uma faixa ['AAAA-MM-DD', dia seguinte) comparada ao texto ISO de dataHora,
+# o que permite usar o índice (paciente_id, dataHora)
+_SQL_CONTEXTO_AGENDAMENTO = """
+    SELECT u.id AS aluno_id, u.nome AS aluno_nome, u.tipo_usuario AS aluno_tipo,
+           COALESCE(a.clinica_id, pr.clinica_id) AS aluno_clinica_id,
+           p.id AS paciente_id, p.nome AS paciente_nome, p.clinica_id AS paciente_clinica_id,
+           EXISTS(
+               SELECT 1 FROM atendimentos at
+               WHERE at.paciente_id = params.paciente_id
+                 AND at.dataHora >= params.dia_inicio
+                 AND at.dataHora < params.dia_fim
+           ) AS paciente_tem_agendamento_no_dia
+    FROM (SELECT ? AS aluno_id, ? AS paciente_id, ? AS dia_inicio, ? AS dia_fim) AS params
+    LEFT JOIN usuarios_sistema u ON u.id = params.aluno_id
+    LEFT JOIN alunos a ON a.id = u.id
+    LEFT JOIN professores pr ON pr.id = u.id
+    LEFT JOIN pacientes p ON p.id = params.paciente_id
+"""
+
+# Lista de IDs enviada como um único parâmetro JSON: o texto do SQL não muda com a quantidade de IDs
+_SQL_GET_PATIENTS_BY_IDS = """
+    SELECT id, nome, cpf, dataNascimento, statusAtendimento, clinica_id
+    FROM pacientes
+    WHERE id IN (SELECT value FROM json_each(?))
+"""
+
+_SQL_UPDATE_USUARIO = """
+    UPDATE usuarios_sistema
+    SET nome = COALESCE(?, nome), email = COALESCE(?, email)
+    WHERE id = ?
+    RETURNING id, nome, cpf, email, tipo_usuario
+"""
+
+_SQL_EMAIL_EM_USO = """
+    SELECT 1 FROM usuarios_sistema WHERE lower(email) = ? AND id <> ? LIMIT 1
+"""
+
+# Campos específicos por tipo: None em um parâmetro mantém o valor atual da coluna
+_SQL_UPDATE_ALUNO = """
+    UPDATE alunos
+    SET matricula = COALESCE(?, matricula),
+        telefone = COALESCE(?, telefone),
+        clinica_id = COALESCE(?, clinica_id)
+    WHERE id = ?
+    RETURNING clinica_id
+"""
+
+_SQL_UPDATE_PROFESSOR = """
+    UPDATE professores
+    SET especialidade = COALESCE(?, especialidade),
+        clinica_id = COALESCE(?, clinica_id)
+    WHERE id = ?
+    RETURNING clinica_id
+"""
+
+_SQL_UPDATE_RECEPCIONISTA = """
+    UPDATE recepcionistas
+    SET telefone = COALESCE(?, telefone)
+    WHERE id = ?
+"""
+
+_SQL_LIST_USERS_WITH_DETAILS = """
+    SELECT u.id, u.nome, u.email, u.cpf, u.ativo, u.tipo_usuario,
+           a.matricula,
+           COALESCE(a.telefone, r.telefone) AS telefone,
+           p.especialidade,
+           COALESCE(a.clinica_id, p.clinica_id) AS clinica_id
+    FROM usuarios_sistema u
+    LEFT JOIN alunos a ON a.id = u.id
+    LEFT JOIN professores p ON p.id = u.id
+    LEFT JOIN recepcionistas r ON r.id = u.id
+    ORDER BY u.nome
+"""
+
+_SQL_LIST_ALUNOS = """
+    SELECT u.id, u.nome, a.matricula, u.cpf, a.clinica_id
+    FROM alunos a
+    JOIN usuarios_sistema u ON u.id = a.id
+    WHERE (? = 0 OR u.ativo = 1)
+    ORDER BY u.nome ASC
+"""
+
+_SQL_GET_USER_BY_EMAIL = """
+    SELECT id, nome, cpf, email, tipo_usuario
+    FROM usuarios_sistema
+    WHERE lower(email) = ?
+    LIMIT 1
+"""
 
 
 def get_db_path() -> str:
     """Retorna o caminho do banco de dados."""
-    return os.path.join(os.path.dirname(__file__), "..", "..", "desktop", "clinisys_uc_admin.db")
+    return DB_SYNC_PATH
 
 
-def get_user_by_id_sync_direct(user_id: int) -> Optional[Dict[str, Any]]:
-    """Busca usuário por ID diretamente no SQLite (sem asyncio)."""
-    db_path = get_db_path()
+def _get_conn() -> Optional[sqlite3.Connection]:
+    """
+    Retorna a conexão SQLite da thread atual, criando-a na primeira chamada.
+    Retorna None se o arquivo do banco ainda não existir (verificado só na criação,
+    as chamadas seguintes não fazem stat no arquivo).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
     
+    db_path = get_db_path()
     if not os.path.exists(db_path):
         return None
     
-    conn = sqlite3.connect(db_path)
+    conn = conectar_sqlite(
+        check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        isolation_level=None  # autocommit: escritas abrem transação explícita (BEGIN IMMEDIATE)
+    )
     conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
+    
+    _local.conn = conn
+    with _conexoes_lock:
+        _conexoes.append(conn)
+    return conn
+
+
+@atexit.register
+def _fechar_conexoes() -> None:
+    """Fecha as conexões do pool ao encerrar o processo."""
+    with _conexoes_lock:
+        for conn in _conexoes:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _conexoes.clear()
+
+
+def get_user_by_id_sync_direct(user_id: int) -> Optional[Dict[str, Any]]:
+    """Busca usuário por ID diretamente no SQLite (sem asyncio), com cache de curta duração."""
+    usuario = _cache_usuarios.get(user_id)
+    if usuario is None:
+        usuario = _raw_get_user_by_id(user_id)
+        if usuario is None:
+            return None
+        _cache_usuarios.set(user_id, usuario)
+    return dict(usuario)  # cópia: o chamador pode alterar o dicionário
+
+
+def _usuario_dict(row: sqlite3.Row, clinica_id: Optional[int]) -> Dict[str, Any]:
+    """Formato único do usuário devolvido por get_user_by_id_sync_direct e update_user_sync_direct."""
+    return {
+        'id': row['id'],
+        'nome': row['nome'],
+        'cpf': row['cpf'],
+        'email': row['email'],
+        'tipo': _tipo_exibicao(row['tipo_usuario']),
+        'tipo_usuario': row['tipo_usuario'].lower(),
+        'clinica_id': clinica_id
+    }
+
+
+def _raw_get_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
+    """Consulta o usuário por ID no SQLite, sem passar pelo cache."""
+    conn = _get_conn()
+    if conn is None:
+        return None
+    
     cursor = conn.cursor()
     
-    try:
-        # Buscar usuário base
-        cursor.execute("""
-            SELECT id, nome, cpf, email, tipo_usuario
-            FROM usuarios_sistema
-            WHERE id = ?
-        """, (user_id,))
-        
-        row = cursor.fetchone()
-        
-        if not row:
+    # Buscar usuário base (clinica_id vem de alunos/professores; NULL para os demais tipos)
+    cursor.execute(_SQL_GET_USER_BY_ID, (user_id,))
+    
+    row = cursor.fetchone()
+    
+    if not row:
+        return None
+    
+    return _usuario_dict(row, row['clinica_id'])
+
+
+def get_patient_by_id_sync_direct(patient_id: int) -> Optional[Dict[str, Any]]:
+    """Busca paciente por ID diretamente no SQLite (sem asyncio), com cache de curta duração."""
+    paciente = _cache_pacientes.get(patient_id)
+    if paciente is None:
+        paciente = _raw_get_patient_by_id(patient_id)
+        if paciente is None:
             return None
-        
-        user_dict = {
+        _cache_pacientes.set(patient_id, paciente)
+    return dict(paciente)  # cópia: o chamador pode alterar o dicionário
+
+
+def _raw_get_patient_by_id(patient_id: int) -> Optional[Dict[str, Any]]:
+    """Consulta o paciente por ID no SQLite, sem passar pelo cache."""
+    conn = _get_conn()
+    if conn is None:
+        return None
+    
+    cursor = conn.cursor()
+    
+    # Buscar paciente
+    cursor.execute(_SQL_GET_PATIENT_BY_ID, (patient_id,))
+    
+    row = cursor.fetchone()
+    
+    if row:
+        return {
             'id': row['id'],
             'nome': row['nome'],
             'cpf': row['cpf'],
-            'email': row['email'],
-            'tipo': row['tipo_usuario'].capitalize(),  # Padronizar primeira letra maiúscula
-            'clinica_id': None
+            'dataNascimento': row['dataNascimento'],  # já convertido para date (PARSE_DECLTYPES)
+            'statusAtendimento': row['statusAtendimento'],
+            'clinica_id': row['clinica_id']
         }
-        
-        # Se for aluno, buscar clinica_id da tabela alunos
-        if row['tipo_usuario'].lower() == 'aluno':
-            cursor.execute("""
-                SELECT clinica_id
-                FROM alunos
-                WHERE id = ?
-            """, (user_id,))
-            
-            aluno_row = cursor.fetchone()
-            if aluno_row and aluno_row['clinica_id']:
-                user_dict['clinica_id'] = aluno_row['clinica_id']
-        
-        return user_dict
     
-    finally:
-        conn.close()
+    return None
 
 
-def get_patient_by_id_sync_direct(patient_id: int) -> Optional[Dict[str, Any]]:
-    """Busca paciente por ID diretamente no SQLite (sem asyncio)."""
-    db_path = get_db_path()
+def get_patients_by_ids_sync_direct(patient_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Busca vários pacientes de uma vez diretamente no SQLite (sem asyncio).
+    Retorna um dicionário {id: dados do paciente}; IDs inexistentes ficam de fora.
+    """
+    ids = list(patient_ids)
+    if not ids:
+        return {}
     
-    if not os.path.exists(db_path):
-        return None
+    conn = _get_conn()
+    if conn is None:
+        return {}
     
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
+    cursor.execute(_SQL_GET_PATIENTS_BY_IDS, (json.dumps(ids),))
     
-    try:
-        # Buscar paciente
-        cursor.execute("""
-            SELECT id, nome, cpf, dataNascimento, statusAtendimento, clinica_id
-            FROM pacientes
-            WHERE id = ?
-        """, (patient_id,))
-        
-        row = cursor.fetchone()
-        
-        if row:
-            # Converter data nascimento de string para datetime
-            data_nasc_str = row['dataNascimento']
-            if isinstance(data_nasc_str, str):
-                data_nasc = datetime.strptime(data_nasc_str, "%Y-%m-%d").date()
-            else:
-                data_nasc = data_nasc_str
-            
-            return {
-                'id': row['id'],
-                'nome': row['nome'],
-                'cpf': row['cpf'],
-                'dataNascimento': data_nasc,
-                'statusAtendimento': row['statusAtendimento'],
-                'clinica_id': row['clinica_id'] if 'clinica_id' in row.keys() else None
-            }
-        
-        return None
+    return {
+        row['id']: {
+            'id': row['id'],
+            'nome': row['nome'],
+            'cpf': row['cpf'],
+            'dataNascimento': row['dataNascimento'],
+            'statusAtendimento': row['statusAtendimento'],
+            'clinica_id': row['clinica_id']
+        }
+        for row in cursor.fetchall()
+    }
+
+
+def get_contexto_agendamento_sync_direct(
+    aluno_id: int, paciente_id: int, data_hora: datetime
+) -> Dict[str, Any]:
+    """
+    Coleta em uma única consulta tudo o que criar_atendimento precisa validar (sem asyncio).
+    Retorna {'aluno', 'paciente', 'paciente_tem_agendamento_no_dia'}; aluno/paciente são
+    None se não encontrados.
+    """
+    contexto: Dict[str, Any] = {
+        'aluno': None,
+        'paciente': None,
+        'paciente_tem_agendamento_no_dia': False
+    }
     
-    finally:
-        conn.close()
+    conn = _get_conn()
+    if conn is None:
+        return contexto
+    
+    cursor = conn.cursor()
+    dia = data_hora.date()
+    cursor.execute(
+        _SQL_CONTEXTO_AGENDAMENTO,
+        (aluno_id, paciente_id, dia.isoformat(), (dia + timedelta(days=1)).isoformat())
+    )
+    row = cursor.fetchone()
+    
+    if row['aluno_id'] is not None:
+        contexto['aluno'] = {
+            'id': row['aluno_id'],
+            'nome': row['aluno_nome'],
+            'tipo': _tipo_exibicao(row['aluno_tipo']),
+            'clinica_id': row['aluno_clinica_id']
+        }
+    
+    if row['paciente_id'] is not None:
+        contexto['paciente'] = {
+            'id': row['paciente_id'],
+            'nome': row['paciente_nome'],
+            'clinica_id': row['paciente_clinica_id']
+        }
+    
+    contexto['paciente_tem_agendamento_no_dia'] = bool(row['paciente_tem_agendamento_no_dia'])
+    return contexto
 
 
 def update_user_sync_direct(user_id: int, nome: Optional[str] = None, 
@@ -114,99 +367,61 @@ def update_user_sync_direct(user_id: int, nome: Optional[str] = None,
     """
     Atualiza usuário diretamente no SQLite (sem asyncio).
     Retorna os dados atualizados do usuário ou None se não encontrado.
+    Levanta ValueError se o novo email já pertencer a outro usuário.
     """
-    db_path = get_db_path()
-    
-    if not os.path.exists(db_path):
+    conn = _get_conn()
+    if conn is None:
         return None
     
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    try:
-        # Verificar se usuário existe
-        cursor.execute("SELECT id, tipo_usuario FROM usuarios_sistema WHERE id = ?", (user_id,))
+    with conn:  # commit automático, rollback em caso de exceção
+        cursor.execute("BEGIN IMMEDIATE")
+        
+        # Verificação de email feita dentro da transação (BEGIN IMMEDIATE): sem corrida com outra escrita
+        if email:
+            email = email.strip().lower()
+            cursor.execute(_SQL_EMAIL_EM_USO, (email, user_id))
+            if cursor.fetchone():
+                raise ValueError(f"Email {email} já está em uso por outro usuário")
+        
+        # Atualizar campos básicos e verificar existência em um único comando
+        cursor.execute(_SQL_UPDATE_USUARIO, (nome, email, user_id))
         row = cursor.fetchone()
         
         if not row:
             return None
         
-        tipo_usuario = row['tipo_usuario']
-        
-        # Atualizar campos básicos na tabela usuarios_sistema
-        updates = []
-        params = []
-        
-        if nome is not None:
-            updates.append("nome = ?")
-            params.append(nome)
+        user_dict = _usuario_dict(row, None)
+        tipo_usuario = user_dict['tipo_usuario']
         
-        if email is not None:
-            updates.append("email = ?")
-            params.append(email)
+        # Atualizar campos específicos por tipo (SQL fixo; None mantém o valor atual).
+        # clinica_id volta do RETURNING, como em _SQL_GET_USER_BY_ID (aluno ou professor)
+        if tipo_usuario == 'aluno':
+            cursor.execute(_SQL_UPDATE_ALUNO, (
+                kwargs.get('matricula'),
+                kwargs.get('telefone'),
+                kwargs.get('clinica_id'),
+                user_id
+            ))
         
-        if updates:
-            params.append(user_id)
-            sql = f"UPDATE usuarios_sistema SET {', '.join(updates)} WHERE id = ?"
-            cursor.execute(sql, params)
+        elif tipo_usuario == 'professor':
+            cursor.execute(_SQL_UPDATE_PROFESSOR, (
+                kwargs.get('especialidade'),
+                kwargs.get('clinica_id'),
+                user_id
+            ))
         
-        # Atualizar campos específicos por tipo
-        if tipo_usuario.lower() == 'aluno':
-            aluno_updates = []
-            aluno_params = []
-            
-            if 'matricula' in kwargs and kwargs['matricula'] is not None:
-                aluno_updates.append("matricula = ?")
-                aluno_params.append(kwargs['matricula'])
-            
-            if 'telefone' in kwargs and kwargs['telefone'] is not None:
-                aluno_updates.append("telefone = ?")
-                aluno_params.append(kwargs['telefone'])
-            
-            if 'clinica_id' in kwargs and kwargs['clinica_id'] is not None:
-                aluno_updates.append("clinica_id = ?")
-                aluno_params.append(kwargs['clinica_id'])
-            
-            if aluno_updates:
-                aluno_params.append(user_id)
-                sql = f"UPDATE alunos SET {', '.join(aluno_updates)} WHERE id = ?"
-                cursor.execute(sql, aluno_params)
+        elif tipo_usuario == 'recepcionista':
+            cursor.execute(_SQL_UPDATE_RECEPCIONISTA, (kwargs.get('telefone'), user_id))
         
-        elif tipo_usuario.lower() == 'professor':
-            prof_updates = []
-            prof_params = []
-            
-            if 'especialidade' in kwargs and kwargs['especialidade'] is not None:
-                prof_updates.append("especialidade = ?")
-                prof_params.append(kwargs['especialidade'])
-            
-            if 'clinica_id' in kwargs and kwargs['clinica_id'] is not None:
-                prof_updates.append("clinica_id = ?")
-                prof_params.append(kwargs['clinica_id'])
-            
-            if prof_updates:
-                prof_params.append(user_id)
-                sql = f"UPDATE professores SET {', '.join(prof_updates)} WHERE id = ?"
-                cursor.execute(sql, prof_params)
-        
-        elif tipo_usuario.lower() == 'recepcionista':
-            if 'telefone' in kwargs and kwargs['telefone'] is not None:
-                cursor.execute("UPDATE recepcionistas SET telefone = ? WHERE id = ?", 
-                             (kwargs['telefone'], user_id))
-        
-        # Commit das alterações
-        conn.commit()
-        
-        # Buscar dados atualizados
-        return get_user_by_id_sync_direct(user_id)
-    
-    except Exception as e:
-        conn.rollback()
-        raise e
+        if tipo_usuario in ('aluno', 'professor'):
+            especifico = cursor.fetchone()
+            if especifico:
+                user_dict['clinica_id'] = especifico['clinica_id']
     
-    finally:
-        conn.close()
+    invalidar_usuario_cache(user_id)
+    return user_dict
 
 
 def get_user_by_email_sync_direct(email: str) -> Optional[Dict[str, Any]]:
@@ -214,34 +429,54 @@ def get_user_by_email_sync_direct(email: str) -> Optional[Dict[str, Any]]:
     Busca usuário por email diretamente no SQLite (sem asyncio).
     Retorna os dados do usuário ou None se não encontrado.
     """
-    db_path = get_db_path()
-    
-    if not os.path.exists(db_path):
+    conn = _get_conn()
+    if conn is None:
         return None
     
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    try:
-        cursor.execute("""
-            SELECT id, nome, cpf, email, tipo_usuario
-            FROM usuarios_sistema
-            WHERE email = ?
-        """, (email,))
-        
-        row = cursor.fetchone()
-        
-        if row:
-            return {
-                'id': row['id'],
-                'nome': row['nome'],
-                'cpf': row['cpf'],
-                'email': row['email'],
-                'tipo': row['tipo_usuario'].capitalize()
-            }
-        
-        return None
+    cursor.execute(_SQL_GET_USER_BY_EMAIL, (email.strip().lower(),))
+    
+    row = cursor.fetchone()
     
-    finally:
-        conn.close()
+    if row:
+        return {
+            'id': row['id'],
+            'nome': row['nome'],
+            'cpf': row['cpf'],
+            'email': row['email'],
+            'tipo': _tipo_exibicao(row['tipo_usuario'])
+        }
+    
+    return None
+
+
+def list_users_with_details_sync_direct() -> list:
+    """
+    Lista todos os usuários com os campos específicos de cada tipo (sem asyncio).
+    Uma única consulta com LEFT JOIN nas tabelas de cada tipo (evita N+1).
+    """
+    conn = _get_conn()
+    if conn is None:
+        return []
+    
+    cursor = conn.cursor()
+    cursor.execute(_SQL_LIST_USERS_WITH_DETAILS)
+    
+    usuarios = []
+    for row in cursor.fetchall():
+        usuario = dict(row)
+        usuario['ativo'] = bool(usuario['ativo'])
+        usuarios.append(usuario)
+    return usuarios
+
+
+def list_alunos_sync_direct(apenas_ativos: bool = True) -> list:
+    """Lista alunos (opcionalmente apenas os ativos) diretamente no SQLite (sem asyncio)."""
+    conn = _get_conn()
+    if conn is None:
+        return []
+    
+    cursor = conn.cursor()
+    cursor.execute(_SQL_LIST_ALUNOS, (1 if apenas_ativos else 0,))
+    return [dict(row) for row in cursor.fetchall()]
@@ -2,15 +2,34 @@
 Repository para operações de triagem - CliniSys Desktop
 """
 import sqlite3
+import threading
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 from ..db.database import get_db_sync
+from .sync_helpers import invalidar_paciente_cache
 from ..models.paciente import Paciente
 
 
+_tabela_verificada = False
+_tabela_lock = threading.Lock()
+
+
 def ensure_triagem_table():
-    """Garante que a tabela triagens existe no banco."""
+    """Garante que a tabela triagens existe no banco (executa o DDL uma única vez por processo)."""
+    global _tabela_verificada
+    if _tabela_verificada:
+        return
+    
+    with _tabela_lock:
+        if _tabela_verificada:
+            return
+        _criar_tabela_triagens()
+        _tabela_verificada = True
+
+
+def _criar_tabela_triagens():
+    """Executa o CREATE TABLE IF NOT EXISTS da tabela triagens."""
     db = get_db_sync()
     cur = db.cursor()
     try:
@@ -34,6 +53,11 @@ def ensure_triagem_table():
                 FOREIGN KEY (paciente_id) REFERENCES pacientes(id)
             )
         """)
+        # Índice para "última triagem do paciente"
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS ix_triagens_paciente_created
+            ON triagens(paciente_id, created_at DESC)
+        """)
         db.commit()
     finally:
         db.close()
@@ -44,37 +68,41 @@ def create_triagem(dados: Dict[str, Any]) -> int:
     ensure_triagem_table()
     db = get_db_sync()
     cur = db.cursor()
+    sintomas = dados['sintomas']
+    if isinstance(sintomas, list):
+        sintomas = ",".join(sintomas)
+    # Transação explícita: trava de escrita obtida uma vez no início, um único commit no fim
+    db.isolation_level = None
     try:
-        # Inserir triagem
-        cur.execute(
-            """INSERT INTO triagens (
-                paciente_id, queixa, historia, medicamentos, alergias,
-                pressao, fc, temp, fr, spo2, dor, prioridade, sintomas
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                dados['paciente_id'], dados['queixa'], dados['historia'],
-                dados['medicamentos'], dados['alergias'], dados['pressao'],
-                dados['fc'], dados['temp'], dados['fr'], dados['spo2'],
-                dados['dor'], dados['prioridade'], 
-                ",".join(dados['sintomas']) if isinstance(dados['sintomas'], list) else dados['sintomas']
+        with db:  # commit no sucesso, rollback em caso de exceção
+            cur.execute("BEGIN IMMEDIATE")
+            
+            # Inserir triagem
+            cur.execute(
+                """INSERT INTO triagens (
+                    paciente_id, queixa, historia, medicamentos, alergias,
+                    pressao, fc, temp, fr, spo2, dor, prioridade, sintomas
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    dados['paciente_id'], dados['queixa'], dados['historia'],
+                    dados['medicamentos'], dados['alergias'], dados['pressao'],
+                    dados['fc'], dados['temp'], dados['fr'], dados['spo2'],
+                    dados['dor'], dados['prioridade'], sintomas
+                )
+            )
+            triagem_id = cur.lastrowid
+            if triagem_id is None:
+                raise RuntimeError("Falha ao recuperar identificador da triagem recém-criada.")
+
+            # Atualizar status do paciente
+            cur.execute(
+                "UPDATE pacientes SET statusAtendimento = ?, updated_at = ? WHERE id = ?",
+                ("Triado", datetime.now().isoformat(), dados['paciente_id'])
             )
-        )
-        triagem_id = cur.lastrowid
-        if triagem_id is None:
-            raise RuntimeError("Falha ao recuperar identificador da triagem recém-criada.")
-
-        # Atualizar status do paciente
-        cur.execute(
-            "UPDATE pacientes SET statusAtendimento = ?, updated_at = ? WHERE id = ?",
-            ("Triado", datetime.now().isoformat(), dados['paciente_id'])
-        )
         
-        db.commit()
+        invalidar_paciente_cache(dados['paciente_id'])
         return int(triagem_id)
 
-    except Exception as e:
-        db.rollback()
-        raise e
     finally:
         db.close()
 
@@ -114,7 +142,7 @@ def list_triagens_pendentes() -> List[Dict[str, Any]]:
             WHERE p.statusAtendimento = 'Aguardando Triagem'
             ORDER BY chegada ASC
         """)
-        return [dict(row) for row in cur.fetchall()]
+        return list(map(dict, cur.fetchall()))
     finally:
         db.close()
 
@@ -127,28 +155,31 @@ def list_triagens_realizadas() -> List[Dict[str, Any]]:
     cur = db.cursor()
     try:
         cur.execute("""
+            WITH ultimas AS (
+                SELECT
+                    t.*,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY t.paciente_id
+                        ORDER BY t.created_at DESC
+                    ) AS rn
+                FROM triagens t
+            )
             SELECT 
                 p.*,
-                t.created_at as triagem_data,
-                t.prioridade
+                u.created_at as triagem_data,
+                u.prioridade
             FROM pacientes p
-            INNER JOIN triagens t ON t.paciente_id = p.id
+            INNER JOIN ultimas u ON u.paciente_id = p.id AND u.rn = 1
             WHERE p.statusAtendimento = 'Triado'
-            AND t.id = (
-                SELECT id FROM triagens 
-                WHERE paciente_id = p.id 
-                ORDER BY created_at DESC 
-                LIMIT 1
-            )
             ORDER BY 
-                CASE t.prioridade 
+                CASE u.prioridade 
                     WHEN 'Alta' THEN 1
                     WHEN 'Média' THEN 2
                     WHEN 'Baixa' THEN 3
                     ELSE 4
                 END,
-                t.created_at ASC
+                u.created_at ASC
         """)
-        return [dict(row) for row in cur.fetchall()]
+        return list(map(dict, cur.fetchall()))
     finally:
         db.close()
\ No newline at end of file
@@ -5,10 +5,10 @@ Camada de acesso a dados pura - sem lógica de negócio
 
 from __future__ import annotations
 
-import asyncio
-from typing import List, Optional, Type, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type, Union
 
-from sqlalchemy import select, update, delete, text
+from sqlalchemy import select, insert, update, delete, text, func, or_, Row
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
@@ -18,8 +18,15 @@ from ..models.recepcionista import Recepcionista
 from ..models.professor import Professor
 from ..models.aluno import Aluno
 from ..db.database import AsyncSessionLocal
+from ..db.runner import run_async
 from ..db.init_db import create_tables_sync, check_database_sync, create_tables
 from ..core.security_simple import hash_password
+from .sync_helpers import (
+    get_user_by_id_sync_direct,
+    invalidar_usuario_cache,
+    list_users_with_details_sync_direct,
+    list_alunos_sync_direct,
+)
 
 
 class UsuarioRepository:
@@ -31,21 +38,28 @@ class UsuarioRepository:
     @staticmethod
     async def get_by_cpf(db: AsyncSession, cpf: str) -> Optional[UsuarioSistema]:
         """Busca usuário por CPF."""
-        stmt = select(UsuarioSistema).where(UsuarioSistema.cpf == cpf)
+        stmt = select(UsuarioSistema).where(UsuarioSistema.cpf == cpf).limit(1)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
     @staticmethod
     async def get_by_email(db: AsyncSession, email: str) -> Optional[UsuarioSistema]:
-        """Busca usuário por email."""
-        stmt = select(UsuarioSistema).where(UsuarioSistema.email == email)
+        """Busca usuário por email (sem diferenciar maiúsculas, via índice em lower(email))."""
+        stmt = select(UsuarioSistema).where(func.lower(UsuarioSistema.email) == email.strip().lower()).limit(1)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def email_exists(db: AsyncSession, email: str) -> bool:
+        """Indica se o email já está cadastrado (SELECT 1 ... LIMIT 1, sem carregar o usuário)."""
+        stmt = select(1).where(func.lower(UsuarioSistema.email) == email.strip().lower()).limit(1)
+        result = await db.execute(stmt)
+        return result.first() is not None
+
     @staticmethod
     async def get_by_id(db: AsyncSession, user_id: int) -> Optional[UsuarioSistema]:
         """Busca usuário por ID."""
-        stmt = select(UsuarioSistema).where(UsuarioSistema.id == user_id)
+        stmt = select(UsuarioSistema).where(UsuarioSistema.id == user_id).limit(1)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
@@ -53,7 +67,7 @@ class UsuarioRepository:
     async def get_by_matricula(db: AsyncSession, matricula: str) -> Optional[UsuarioSistema]:
         """Busca usuário por matrícula (específico para alunos)."""
         from ..models.aluno import Aluno
-        stmt = select(Aluno).where(Aluno.matricula == matricula)
+        stmt = select(Aluno).where(Aluno.matricula == matricula).limit(1)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
@@ -86,15 +100,21 @@ class UsuarioRepository:
         
         db.add(user)
         await db.commit()
-        await db.refresh(user)
         return user
 
+    @staticmethod
+    async def create_many(db: AsyncSession, usuarios: Sequence[UsuarioSistema]) -> Sequence[UsuarioSistema]:
+        """Cria vários usuários em uma única transação (INSERTs agrupados por tabela)."""
+        db.add_all(usuarios)
+        await db.commit()
+        return usuarios
+
     @staticmethod
     async def list_all(db: AsyncSession) -> List[UsuarioSistema]:
         """Lista todos os usuários."""
         stmt = select(UsuarioSistema).order_by(UsuarioSistema.nome)
         result = await db.execute(stmt)
-        return list(result.scalars().all())
+        return result.scalars().all()
 
     @staticmethod
     async def list_alunos(
@@ -108,60 +128,7 @@ class UsuarioRepository:
             stmt = stmt.where(Aluno.ativo.is_(True))
         stmt = stmt.order_by(Aluno.nome.asc())
         result = await db.execute(stmt)
-        return list(result.scalars().all())
-
-    @staticmethod
-    async def list_all_with_details(db: AsyncSession) -> List[dict]:
-        """Lista todos os usuários com detalhes específicos por tipo - estrutura CliniSys original."""
-        from ..models.aluno import Aluno
-        from ..models.professor import Professor
-        from ..models.recepcionista import Recepcionista
-        from ..models.administrador import Administrador
-        
-        # Buscar todos os usuários base com joinedload para evitar lazy loading
-        from sqlalchemy.orm import selectinload
-        
-        stmt = select(UsuarioSistema).order_by(UsuarioSistema.nome)
-        result = await db.execute(stmt)
-        users = list(result.scalars().all())
-        
-        users_with_details = []
-        for user in users:
-            # Fazer refresh na sessão para garantir acesso às propriedades
-            await db.refresh(user)
-            
-            user_data = {
-                "id": user.id,
-                "nome": user.nome,
-                "email": user.email,
-                "cpf": user.cpf,
-                "ativo": user.ativo,
-                "tipo_usuario": user.tipo_usuario,
-                "matricula": None,
-                "telefone": None,
-                "especialidade": None,
-                "clinica_id": None
-            }
-            
-            # Buscar dados específicos baseado no tipo usando polimorfismo
-            try:
-                if isinstance(user, Aluno):
-                    user_data["matricula"] = user.matricula
-                    user_data["telefone"] = user.telefone
-                    user_data["clinica_id"] = user.clinica_id
-                        
-                elif isinstance(user, Professor):
-                    user_data["especialidade"] = user.especialidade
-                    user_data["clinica_id"] = user.clinica_id
-                        
-                elif isinstance(user, Recepcionista):
-                    user_data["telefone"] = user.telefone
-            except Exception as e:
-                print(f"Erro ao acessar propriedades do usuário {user.id}: {e}")
-                    
-            users_with_details.append(user_data)
-        
-        return users_with_details
+        return result.scalars().all()
 
     @staticmethod
     async def update(
@@ -188,7 +155,7 @@ class UsuarioRepository:
             user.senha_hash = senha_hash
         
         await db.commit()
-        await db.refresh(user)
+        invalidar_usuario_cache(user_id)
         return user
 
     @staticmethod
@@ -200,44 +167,75 @@ class UsuarioRepository:
         
         await db.delete(user)
         await db.commit()
+        invalidar_usuario_cache(user_id)
         return True
 
     @staticmethod
-    async def set_active_status(db: AsyncSession, user_id: int, ativo: bool) -> Optional[UsuarioSistema]:
+    async def _atualizar_colunas(db: AsyncSession, user_id: int, **valores) -> Optional[Row]:
+        """
+        UPDATE direto (sem carregar o usuário antes); retorna id, nome e ativo do usuário
+        alterado via RETURNING, ou None se o usuário não existir.
+        """
+        stmt = (
+            update(UsuarioSistema)
+            .where(UsuarioSistema.id == user_id)
+            .values(**valores)
+            .returning(UsuarioSistema.id, UsuarioSistema.nome, UsuarioSistema.ativo)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await db.execute(stmt)).one_or_none()
+        await db.commit()
+        if row is not None:
+            invalidar_usuario_cache(user_id)
+        return row
+
+    @staticmethod
+    async def set_active_status(db: AsyncSession, user_id: int, ativo: bool) -> Optional[Row]:
         """Ativa/desativa usuário."""
-        return await UsuarioRepository.update(db, user_id, ativo=ativo)
+        return await UsuarioRepository._atualizar_colunas(db, user_id, ativo=ativo)
 
     @staticmethod
-    async def change_password(db: AsyncSession, user_id: int, nova_senha_hash: str) -> Optional[UsuarioSistema]:
+    async def change_password(db: AsyncSession, user_id: int, nova_senha_hash: str) -> Optional[Row]:
         """Altera senha do usuário."""
-        return await UsuarioRepository.update(db, user_id, senha_hash=nova_senha_hash)
+        return await UsuarioRepository._atualizar_colunas(db, user_id, senha_hash=nova_senha_hash)
 
     @staticmethod
     async def create_default_admin(db: AsyncSession):
         """Cria usuário admin padrão se não existir."""
         from ..core.config import settings
-        admin_user = await UsuarioRepository.get_by_email(db, settings.admin_email)
-        if not admin_user:
-            admin_password_hash = hash_password(settings.admin_password)
-            await UsuarioRepository.create_specific(
-                db,
-                user_class=Administrador,
+        usuarios = UsuarioSistema.__table__
+        # Core INSERT não passa pelo @validates("email") do modelo: normalizar aqui
+        email = settings.admin_email.strip().lower()
+        # Consulta barata antes do hash: na maioria das inicializações o admin já existe
+        existe = await db.execute(
+            select(1)
+            .where(or_(func.lower(usuarios.c.email) == email, usuarios.c.cpf == settings.admin_cpf))
+            .limit(1)
+        )
+        if existe.first() is not None:
+            return
+        # INSERT ... ON CONFLICT DO NOTHING continua cobrindo a corrida entre a consulta e a inserção
+        stmt = (
+            sqlite_insert(usuarios)
+            .values(
                 nome="Administrador",
-                email=settings.admin_email,
+                email=email,
                 cpf=settings.admin_cpf,
-                senha_hash=admin_password_hash,
-                ativo=True
+                senha_hash=hash_password(settings.admin_password),
+                ativo=True,
+                tipo_usuario="administrador",
             )
+            .on_conflict_do_nothing()
+            .returning(usuarios.c.id)
+        )
+        admin_id = (await db.execute(stmt)).scalar_one_or_none()
+        if admin_id is not None:
+            await db.execute(insert(Administrador.__table__).values(id=admin_id))
+        await db.commit()
 
 
 # ===================== Funções Síncronas (Desktop Wrappers) ===================== #
 
-def run_async(coro):
-    """Executa função assíncrona de forma síncrona."""
-    # Sempre usar asyncio.run para criar um novo event loop limpo
-    return asyncio.run(coro)
-
-
 def create_user_specific_sync(
     user_class: Type[UsuarioSistema], 
     nome: str, 
@@ -263,6 +261,25 @@ def create_user_specific_sync(
     return run_async(_create())
 
 
+def create_users_specific_sync(registros: Iterable[Dict[str, Any]]) -> List[UsuarioSistema]:
+    """
+    Cria vários usuários de uma vez.
+    Cada registro traz 'user_class', 'nome', 'email', 'cpf', 'senha' e os campos específicos da classe.
+    """
+    usuarios = []
+    for registro in registros:
+        dados = dict(registro)
+        user_class = dados.pop("user_class")
+        dados["senha_hash"] = hash_password(dados.pop("senha"))
+        usuarios.append(user_class(**dados))
+
+    async def _create():
+        async with AsyncSessionLocal() as db:
+            return await UsuarioRepository.create_many(db, usuarios)
+    
+    return list(run_async(_create()))
+
+
 def list_users_sync() -> List[UsuarioSistema]:
     """Versão síncrona de list_users."""
     async def _list():
@@ -273,53 +290,18 @@ def list_users_sync() -> List[UsuarioSistema]:
 
 
 def list_users_with_details_sync() -> List[dict]:
-    """Versão síncrona de list_users_with_details."""
-    async def _list():
-        async with AsyncSessionLocal() as db:
-            return await UsuarioRepository.list_all_with_details(db)
-    
-    return run_async(_list())
+    """Versão síncrona de list_users_with_details (consulta direta ao SQLite)."""
+    return list_users_with_details_sync_direct()
 
 
 def list_alunos_sync(apenas_ativos: bool = True) -> List[dict]:
-    """Versão síncrona de list_alunos."""
-
-    async def _list():
-        async with AsyncSessionLocal() as db:
-            alunos = await UsuarioRepository.list_alunos(db, apenas_ativos=apenas_ativos)
-            return [
-                {
-                    "id": aluno.id,
-                    "nome": aluno.nome,
-                    "matricula": getattr(aluno, "matricula", None),
-                    "cpf": aluno.cpf,
-                    "clinica_id": getattr(aluno, "clinica_id", None),
-                }
-                for aluno in alunos
-            ]
-
-    return run_async(_list())
+    """Versão síncrona de list_alunos (consulta direta ao SQLite)."""
+    return list_alunos_sync_direct(apenas_ativos)
 
 
 def get_user_by_id_sync(user_id: int) -> Optional[dict]:
     """Versão síncrona de get_user_by_id. Retorna dicionário com dados do usuário."""
-    async def _get():
-        async with AsyncSessionLocal() as db:
-            user = await UsuarioRepository.get_by_id(db, user_id)
-            if user:
-                # Converter para dicionário para evitar problemas de sessão
-                user_dict = {
-                    'id': user.id,
-                    'nome': user.nome,
-                    'cpf': user.cpf,
-                    'email': user.email,
-                    'tipo': user.__class__.__name__,
-                    'clinica_id': getattr(user, 'clinica_id', None)
-                }
-                return user_dict
-            return None
-    
-    return run_async(_get())
+    return get_user_by_id_sync_direct(user_id)
 
 
 def get_user_by_cpf_sync(cpf: str) -> Optional[UsuarioSistema]:
@@ -340,6 +322,15 @@ def get_user_by_email_sync(email: str) -> Optional[UsuarioSistema]:
     return run_async(_get())
 
 
+def email_exists_sync(email: str) -> bool:
+    """Versão síncrona de email_exists."""
+    async def _exists():
+        async with AsyncSessionLocal() as db:
+            return await UsuarioRepository.email_exists(db, email)
+    
+    return run_async(_exists())
+
+
 def update_user_sync(
     user_id: int,
     nome: Optional[str] = None,
@@ -366,7 +357,7 @@ def delete_user_sync(user_id: int) -> bool:
     return run_async(_delete())
 
 
-def set_user_active_sync(user_id: int, ativo: bool) -> Optional[UsuarioSistema]:
+def set_user_active_sync(user_id: int, ativo: bool) -> Optional[Row]:
     """Versão síncrona de set_user_active."""
     async def _set_active():
         async with AsyncSessionLocal() as db:
@@ -375,7 +366,7 @@ def set_user_active_sync(user_id: int, ativo: bool) -> Optional[UsuarioSistema]:
     return run_async(_set_active())
 
 
-def change_user_password_sync(user_id: int, nova_senha: str) -> Optional[UsuarioSistema]:
+def change_user_password_sync(user_id: int, nova_senha: str) -> Optional[Row]:
     """Versão síncrona de change_user_password."""
     async def _change_password():
         async with AsyncSessionLocal() as db:
@@ -401,7 +392,7 @@ def init_db_and_seed_sync():
         create_tables_sync()
         
         # Depois criar usuário admin usando versão síncrona
-        return asyncio.run(_create_admin_only())
+        return run_async(_create_admin_only())
     except Exception as e:
         print(f"Erro na inicialização: {e}")
         raise
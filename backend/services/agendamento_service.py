@@ -5,20 +5,36 @@ Regras de negócio para agendamento de consultas
 
 from __future__ import annotations
 
-from datetime import datetime, time
+import logging
+from datetime import date, datetime, timedelta
 from typing import Optional
 
 from ..models.atendimento import Atendimento
 from ..models.aluno import Aluno
 from ..models.paciente import Paciente
 from ..repositories.consulta_repository import (
+    ConsultaConflictError,
     verificar_disponibilidade_sync,
     verificar_conflito_detalhado_sync,
     salvar_sync,
-    verificar_paciente_tem_agendamento_no_dia_sync,
-    listar_horarios_ocupados_por_aluno_sync
+    listar_horarios_ocupados_por_aluno_sync,
+    listar_horarios_ocupados_por_aluno_e_paciente_sync,
+    listar_horarios_ocupados_por_aluno_no_periodo_sync
 )
 from ..repositories.paciente_repository import update_patient_sync
+from ..repositories.sync_helpers import get_contexto_agendamento_sync_direct
+
+logger = logging.getLogger(__name__)
+
+# Horário comercial: 08:00 às 18:00
+HORA_INICIO_COMERCIAL = 8
+HORA_FIM_COMERCIAL = 18
+
+# Todos os horários possíveis de atendimento (pausa para almoço: 12:00-13:00)
+TODOS_HORARIOS: tuple[str, ...] = (
+    "08:00", "09:00", "10:00", "11:00",
+    "13:00", "14:00", "15:00", "16:00", "17:00"
+)
 
 
 # ===================== Validações de Regras de Negócio ===================== #
@@ -37,11 +53,16 @@ def validar_horario_comercial(data_hora: datetime) -> bool:
     RN03: Valida se o horário está dentro do horário comercial (08:00-18:00).
     Retorna True se estiver dentro do horário, False caso contrário.
     """
-    horario = data_hora.time()
-    horario_inicio = time(8, 0)  # 08:00
-    horario_fim = time(18, 0)     # 18:00
-    
-    return horario_inicio <= horario < horario_fim
+    # 08:00 <= horário < 18:00 equivale a comparar só a hora (sem alocar datetime.time)
+    return HORA_INICIO_COMERCIAL <= data_hora.hour < HORA_FIM_COMERCIAL
+
+
+def validar_horario_agendavel(data_hora: datetime) -> bool:
+    """
+    RN03 combinada: dia útil E horário comercial, só com comparações de inteiros.
+    Usada no caminho comum; as validações separadas ficam para montar a mensagem de erro.
+    """
+    return data_hora.weekday() < 5 and HORA_INICIO_COMERCIAL <= data_hora.hour < HORA_FIM_COMERCIAL
 
 
 def validar_data_hora_futura(data_hora: datetime) -> bool:
@@ -63,72 +84,74 @@ def validar_mesma_clinica(aluno: Aluno, paciente: Paciente) -> bool:
     
     Returns:
         True se pertencem à mesma clínica, False caso contrário
-    
-    Raises:
-        Exception: Se o paciente não estiver vinculado a nenhuma clínica
     """
-    # Se ambos não têm clínica, permitir (para compatibilidade com dados antigos)
-    if paciente.clinica_id is None and aluno.clinica_id is None:
-        return True
-    
-    # Se o paciente tem clínica mas o aluno não, ou vice-versa
-    if paciente.clinica_id is None or aluno.clinica_id is None:
-        # Permitir por enquanto (avisar no futuro)
-        return True
-    
-    # Verificar se é a mesma clínica do aluno
-    if aluno.clinica_id != paciente.clinica_id:
-        return False
-    
-    return True
+    return validar_mesma_clinica_por_id(aluno.clinica_id, paciente.clinica_id)
 
 
-def validar_mesma_clinica_por_id(aluno_clinica_id: Optional[int], paciente_clinica_id: Optional[int], 
-                                  aluno_nome: str, paciente_nome: str) -> bool:
+def validar_mesma_clinica_por_id(aluno_clinica_id: Optional[int], paciente_clinica_id: Optional[int]) -> bool:
     """
     RN04: Valida se o paciente pertence à mesma clínica do aluno (versão usando IDs).
+    Sem clínica em um dos lados (dados antigos), o agendamento é permitido.
     
     Args:
         aluno_clinica_id: ID da clínica do aluno
         paciente_clinica_id: ID da clínica do paciente
-        aluno_nome: Nome do aluno (para mensagens de erro)
-        paciente_nome: Nome do paciente (para mensagens de erro)
     
     Returns:
         True se pertencem à mesma clínica, False caso contrário
     """
-    # Se ambos não têm clínica, permitir (para compatibilidade com dados antigos)
-    if paciente_clinica_id is None and aluno_clinica_id is None:
-        return True
+    return aluno_clinica_id is None or paciente_clinica_id is None or aluno_clinica_id == paciente_clinica_id
+
+
+# ===================== Função Principal de Criação ===================== #
+
+def _validar_data_hora_agendamento(data_hora: datetime) -> None:
+    """
+    Validações puramente computacionais (RN05 e RN03); rodam antes de qualquer acesso
+    ao banco para que pedidos inválidos não gerem consultas.
     
-    # Se o paciente tem clínica mas o aluno não, ou vice-versa
-    if paciente_clinica_id is None or aluno_clinica_id is None:
-        # Permitir por enquanto (avisar no futuro)
-        return True
+    Raises:
+        Exception: Com a mensagem da primeira regra violada
+    """
+    # Caminho comum: horário válido, nenhuma mensagem precisa ser montada
+    if validar_horario_agendavel(data_hora) and validar_data_hora_futura(data_hora):
+        return
+    
+    # Validação RN05: Data/hora não pode estar no passado
+    if not validar_data_hora_futura(data_hora):
+        data_formatada = (
+            f"{data_hora.day:02d}/{data_hora.month:02d}/{data_hora.year} "
+            f"às {data_hora.hour:02d}:{data_hora.minute:02d}"
+        )
+        raise Exception(
+            f"Não é possível agendar para uma data/hora no passado.\n"
+            f"Data/hora informada: {data_formatada}"
+        )
     
-    # Verificar se é a mesma clínica do aluno
-    if aluno_clinica_id != paciente_clinica_id:
-        return False
+    # Validação RN03: Dia útil
+    if not validar_dia_util(data_hora):
+        raise Exception("Agendamento fora do horário permitido. Apenas dias úteis (segunda a sexta).")
     
-    return True
-
+    # Validação RN03: Horário comercial
+    if not validar_horario_comercial(data_hora):
+        raise Exception("Agendamento fora do horário permitido. Horário comercial: 08:00 às 18:00.")
 
-# ===================== Função Principal de Criação ===================== #
 
-def criar_atendimento(
+def _validar_contexto_agendamento(
+    contexto: dict,
     aluno_id: int,
     paciente_id: int,
-    data_hora: datetime,
-    tipo: str = "Consulta Odontológica",
-    status: str = "Agendado"
-) -> Atendimento:
-
-    
-    # Buscar aluno e paciente para validações (usar funções síncronas diretas)
-    from ..repositories.sync_helpers import get_user_by_id_sync_direct, get_patient_by_id_sync_direct
+    data_hora: datetime
+) -> None:
+    """
+    Validações que dependem dos dados do banco (existência, RN04 e um agendamento
+    por dia), feitas em Python sobre o contexto já carregado.
     
-    aluno = get_user_by_id_sync_direct(aluno_id)
-    paciente = get_patient_by_id_sync_direct(paciente_id)
+    Raises:
+        Exception: Com a mensagem da primeira regra violada
+    """
+    aluno = contexto['aluno']
+    paciente = contexto['paciente']
     
     if not aluno:
         raise Exception(f"Aluno com ID {aluno_id} não encontrado.")
@@ -144,7 +167,7 @@ def criar_atendimento(
     paciente_clinica_id = paciente['clinica_id']
     
     # Validação RN04: Mesma clínica (usando dados extraídos)
-    if not validar_mesma_clinica_por_id(aluno_clinica_id, paciente_clinica_id, aluno_nome, paciente_nome):
+    if not validar_mesma_clinica_por_id(aluno_clinica_id, paciente_clinica_id):
         raise Exception(
             f"Paciente '{paciente_nome}' não pertence à clínica do aluno '{aluno_nome}'.\n"
             f"Apenas pacientes da mesma clínica podem ser atendidos.\n"
@@ -152,35 +175,34 @@ def criar_atendimento(
             f"Aluno está na clínica ID: {aluno_clinica_id}"
         )
     
-    # Validação RN05: Data/hora não pode estar no passado
-    if not validar_data_hora_futura(data_hora):
-        data_formatada = data_hora.strftime("%d/%m/%Y às %H:%M")
-        raise Exception(
-            f"Não é possível agendar para uma data/hora no passado.\n"
-            f"Data/hora informada: {data_formatada}"
-        )
-    
-    # Validação RN03: Dia útil
-    if not validar_dia_util(data_hora):
-        raise Exception("Agendamento fora do horário permitido. Apenas dias úteis (segunda a sexta).")
-    
-    # Validação RN03: Horário comercial
-    if not validar_horario_comercial(data_hora):
-        raise Exception("Agendamento fora do horário permitido. Horário comercial: 08:00 às 18:00.")
-    
     # Validação NOVA: Paciente só pode ter um agendamento por dia
-    print(f"[DEBUG SERVICE] Verificando agendamento duplicado para paciente {paciente_id} na data {data_hora}")
-    tem_agendamento = verificar_paciente_tem_agendamento_no_dia_sync(paciente_id, data_hora)
-    print(f"[DEBUG SERVICE] Resultado da verificação: {tem_agendamento}")
-    
-    if tem_agendamento:
-        data_formatada = data_hora.strftime("%d/%m/%Y")
+    if contexto['paciente_tem_agendamento_no_dia']:
+        data_formatada = f"{data_hora.day:02d}/{data_hora.month:02d}/{data_hora.year}"
         raise Exception(
             f"O paciente {paciente_nome} já possui um agendamento para o dia {data_formatada}.\n"
             "Cada paciente pode ter apenas um agendamento por dia."
         )
+
+
+def criar_atendimento(
+    aluno_id: int,
+    paciente_id: int,
+    data_hora: datetime,
+    tipo: str = "Consulta Odontológica",
+    status: str = "Agendado"
+) -> Atendimento:
+    """
+    Cria um atendimento (versão síncrona, usada pela interface desktop).
+    """
+    _validar_data_hora_agendamento(data_hora)
+    
+    # Buscar aluno, paciente e agendamentos do paciente no dia em uma única consulta;
+    # as validações são feitas em Python sobre esse contexto
+    contexto = get_contexto_agendamento_sync_direct(aluno_id, paciente_id, data_hora)
+    _validar_contexto_agendamento(contexto, aluno_id, paciente_id, data_hora)
     
-    # Validação de disponibilidade: Verifica conflitos de horário
+    # Validação de disponibilidade: Verifica conflitos de horário.
+    # Bancos antigos podem não ter os índices únicos (ver init_db), então a verificação continua aqui
     conflito_info = verificar_conflito_detalhado_sync(
         aluno_id=aluno_id,
         paciente_id=paciente_id,
@@ -199,8 +221,18 @@ def criar_atendimento(
         status=status
     )
     
-    # Salvar no banco
-    atendimento_salvo = salvar_sync(novo_atendimento)
+    # Salvar no banco: os índices únicos (aluno, horário) e (paciente, horário) rejeitam
+    # o INSERT se outro agendamento ocupou o horário depois da verificação acima
+    try:
+        atendimento_salvo = salvar_sync(novo_atendimento)
+    except ConsultaConflictError:
+        # Caminho raro: detalhar quem está ocupado para a mensagem ao usuário
+        conflito_info = verificar_conflito_detalhado_sync(
+            aluno_id=aluno_id,
+            paciente_id=paciente_id,
+            data_hora=data_hora
+        )
+        raise Exception(conflito_info["mensagem"])
 
     try:
         update_patient_sync(
@@ -208,17 +240,23 @@ def criar_atendimento(
             status_atendimento="Agendado"
         )
     except Exception as exc:  # pragma: no cover - log para acompanhamento
-        print(f"[WARN] Falha ao atualizar status do paciente {paciente_id}: {exc}")
+        logger.warning("Falha ao atualizar status do paciente %s: %s", paciente_id, exc)
     
     return atendimento_salvo
 
 
 # ===================== Funções Auxiliares ===================== #
 
-def listar_horarios_disponiveis(data: datetime, aluno_id: Optional[int] = None) -> list[str]:
+def listar_horarios_disponiveis(
+    data: datetime,
+    aluno_id: Optional[int] = None,
+    paciente_id: Optional[int] = None
+) -> list[str]:
     """
     Retorna lista de horários disponíveis para um determinado dia.
     Se aluno_id for fornecido, filtra apenas horários livres para aquele aluno.
+    Se paciente_id também for fornecido, filtra os horários ocupados por qualquer
+    um dos dois com uma única consulta.
     
     Horários possíveis: 08:00, 09:00, 10:00, 11:00, 13:00, 14:00, 15:00, 16:00, 17:00
     (Pausa para almoço: 12:00-13:00)
@@ -226,6 +264,7 @@ def listar_horarios_disponiveis(data: datetime, aluno_id: Optional[int] = None)
     Args:
         data: Data para verificar disponibilidade
         aluno_id: ID do aluno (opcional). Se fornecido, filtra horários ocupados.
+        paciente_id: ID do paciente (opcional). Usado junto com aluno_id.
     
     Returns:
         Lista de strings com horários disponíveis (formato "HH:MM")
@@ -233,28 +272,65 @@ def listar_horarios_disponiveis(data: datetime, aluno_id: Optional[int] = None)
     if not validar_dia_util(data):
         return []  # Sem horários em fins de semana
     
-    # Todos os horários possíveis
-    todos_horarios = [
-        "08:00", "09:00", "10:00", "11:00",
-        "13:00", "14:00", "15:00", "16:00", "17:00"
-    ]
-    
     # Se não foi fornecido aluno_id, retornar todos os horários
     if aluno_id is None:
-        return todos_horarios
+        return list(TODOS_HORARIOS)
     
-    # Buscar horários já ocupados pelo aluno nesta data
-    horarios_ocupados = listar_horarios_ocupados_por_aluno_sync(aluno_id, data)
+    # Buscar horários já ocupados nesta data (aluno e, se informado, paciente)
+    if paciente_id is not None:
+        horarios_ocupados = listar_horarios_ocupados_por_aluno_e_paciente_sync(aluno_id, paciente_id, data)
+    else:
+        horarios_ocupados = listar_horarios_ocupados_por_aluno_sync(aluno_id, data)
     
     # Converter datetime para string "HH:MM"
-    horarios_ocupados_str = [h.strftime("%H:%M") for h in horarios_ocupados]
+    horarios_ocupados_str = frozenset(h.strftime("%H:%M") for h in horarios_ocupados)
     
     # Filtrar apenas horários disponíveis
-    horarios_disponiveis = [h for h in todos_horarios if h not in horarios_ocupados_str]
+    horarios_disponiveis = [h for h in TODOS_HORARIOS if h not in horarios_ocupados_str]
     
     return horarios_disponiveis
 
 
+def listar_horarios_disponiveis_periodo(
+    aluno_id: int,
+    data_inicio: date,
+    data_fim: date
+) -> dict[date, list[str]]:
+    """
+    Versão em lote de listar_horarios_disponiveis para telas de calendário:
+    busca os horários ocupados do aluno em todo o período com uma única consulta.
+    
+    Args:
+        aluno_id: ID do aluno
+        data_inicio: Primeiro dia do período (inclusivo)
+        data_fim: Último dia do período (inclusivo)
+    
+    Returns:
+        Dicionário {dia útil: lista de horários disponíveis "HH:MM"}; fins de semana ficam de fora
+    """
+    if data_fim < data_inicio:
+        return {}
+    
+    # Agrupar os horários ocupados por dia
+    ocupados_por_dia: dict[date, set[str]] = {}
+    for ocupado in listar_horarios_ocupados_por_aluno_no_periodo_sync(aluno_id, data_inicio, data_fim):
+        ocupados_por_dia.setdefault(ocupado.date(), set()).add(
+            f"{ocupado.hour:02d}:{ocupado.minute:02d}"
+        )
+    
+    disponiveis: dict[date, list[str]] = {}
+    dia = data_inicio
+    while dia <= data_fim:
+        if validar_dia_util(dia):
+            ocupados = ocupados_por_dia.get(dia)
+            disponiveis[dia] = (
+                [h for h in TODOS_HORARIOS if h not in ocupados] if ocupados else list(TODOS_HORARIOS)
+            )
+        dia += timedelta(days=1)
+    
+    return disponiveis
+
+
 def formatar_data_hora(data_str: str, horario_str: str) -> datetime:
     """
     Converte strings de data (DD/MM/AAAA) e horário (HH:MM) em datetime.
@@ -270,22 +346,6 @@ def formatar_data_hora(data_str: str, horario_str: str) -> datetime:
         ValueError: Se o formato estiver incorreto
     """
     try:
-        # Parse da data
-        dia, mes, ano = data_str.split('/')
-        
-        # Parse do horário
-        hora, minuto = horario_str.split(':')
-        
-        # Criar datetime
-        data_hora = datetime(
-            year=int(ano),
-            month=int(mes),
-            day=int(dia),
-            hour=int(hora),
-            minute=int(minuto)
-        )
-        
-        return data_hora
-    
-    except (ValueError, IndexError) as e:
+        return datetime.strptime(f"{data_str} {horario_str}", "%d/%m/%Y %H:%M")
+    except ValueError as e:
         raise ValueError(f"Formato de data/hora inválido: {str(e)}")
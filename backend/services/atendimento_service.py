@@ -6,71 +6,93 @@ Serviços relacionados ao registro de procedimentos em atendimentos.
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Dict, Any, Iterator
 
 from ..repositories.consulta_repository import (
     get_by_id_sync,
     listar_agendados_por_aluno_sync,
     listar_concluidos_por_aluno_sync,
-    registrar_procedimentos_sync,
+    registrar_procedimentos_e_concluir_sync,
 )
-from ..repositories.paciente_repository import update_patient_sync
-from ..repositories.sync_helpers import get_patient_by_id_sync_direct
+from ..core.cache import CacheTTL
+from ..repositories.sync_helpers import get_patients_by_ids_sync_direct
 
 
-def listar_agendados_para_execucao(aluno_id: int) -> List[Dict[str, Any]]:
-    """Retorna atendimentos agendados para o aluno informado."""
+# Histórico de atendimentos concluídos por aluno: reaberturas seguidas da tela não voltam ao banco.
+# registrar_procedimentos descarta a entrada do aluno ao concluir um novo atendimento.
+_cache_realizados = CacheTTL(maxsize=128, ttl=30)
+
+
+def listar_agendados_para_execucao(aluno_id: int) -> Iterator[Dict[str, Any]]:
+    """
+    Retorna atendimentos agendados para o aluno informado.
+    Os itens são gerados sob demanda; use list(...) se precisar materializar.
+    """
     if not aluno_id:
         raise ValueError("ID do aluno é obrigatório.")
 
     atendimentos = listar_agendados_por_aluno_sync(aluno_id)
-    resultado: List[Dict[str, Any]] = []
-
-    for atendimento in atendimentos:
-        paciente_info = None
-        if atendimento.paciente_id:
-            paciente_info = get_patient_by_id_sync_direct(atendimento.paciente_id)
-
-        resultado.append(
-            {
-                "id": atendimento.id,
-                "data_hora": atendimento.dataHora,
-                "tipo": atendimento.tipo,
-                "paciente_id": atendimento.paciente_id,
-                "paciente_nome": paciente_info.get("nome") if paciente_info else None,
-            }
-        )
+    # Carrega todos os pacientes referenciados em uma única consulta (evita N+1)
+    pacientes = get_patients_by_ids_sync_direct(
+        {atendimento.paciente_id for atendimento in atendimentos if atendimento.paciente_id}
+    )
 
-    return resultado
+    return (
+        {
+            "id": atendimento.id,
+            "data_hora": atendimento.dataHora,
+            "tipo": atendimento.tipo,
+            "paciente_id": atendimento.paciente_id,
+            "paciente_nome": _nome_paciente(pacientes, atendimento.paciente_id),
+        }
+        for atendimento in atendimentos
+    )
 
 
-def listar_atendimentos_realizados(aluno_id: int) -> List[Dict[str, Any]]:
-    """Retorna atendimentos já concluídos pelo aluno."""
+def listar_atendimentos_realizados(aluno_id: int) -> Iterator[Dict[str, Any]]:
+    """
+    Retorna atendimentos já concluídos pelo aluno (mantidos em cache por 30s).
+    Os itens são gerados sob demanda; use list(...) se precisar materializar.
+    """
     if not aluno_id:
         raise ValueError("ID do aluno é obrigatório.")
 
+    realizados = _cache_realizados.get(aluno_id)
+    if realizados is None:
+        realizados = _carregar_realizados(aluno_id)
+        _cache_realizados.set(aluno_id, realizados)
+
+    # Cópias: o chamador pode alterar os dicionários sem afetar o cache
+    return (dict(item) for item in realizados)
+
+
+def _carregar_realizados(aluno_id: int) -> tuple[Dict[str, Any], ...]:
+    """Consulta os atendimentos concluídos do aluno, já com o nome de cada paciente."""
     atendimentos = listar_concluidos_por_aluno_sync(aluno_id)
-    resultado: List[Dict[str, Any]] = []
+    # Carrega todos os pacientes referenciados em uma única consulta (evita N+1)
+    pacientes = get_patients_by_ids_sync_direct(
+        {atendimento.paciente_id for atendimento in atendimentos if atendimento.paciente_id}
+    )
 
-    for atendimento in atendimentos:
-        paciente_info = None
-        if atendimento.paciente_id:
-            paciente_info = get_patient_by_id_sync_direct(atendimento.paciente_id)
+    return tuple(
+        {
+            "id": atendimento.id,
+            "data_hora": atendimento.dataHora,
+            "tipo": atendimento.tipo,
+            "status": atendimento.status,
+            "paciente_id": atendimento.paciente_id,
+            "paciente_nome": _nome_paciente(pacientes, atendimento.paciente_id),
+            "procedimentos": atendimento.procedimentosRealizados,
+            "observacoes": atendimento.observacoesPosAtendimento,
+        }
+        for atendimento in atendimentos
+    )
 
-        resultado.append(
-            {
-                "id": atendimento.id,
-                "data_hora": atendimento.dataHora,
-                "tipo": atendimento.tipo,
-                "status": atendimento.status,
-                "paciente_id": atendimento.paciente_id,
-                "paciente_nome": paciente_info.get("nome") if paciente_info else None,
-                "procedimentos": atendimento.procedimentosRealizados,
-                "observacoes": atendimento.observacoesPosAtendimento,
-            }
-        )
 
-    return resultado
+def _nome_paciente(pacientes: Dict[int, Dict[str, Any]], paciente_id: int | None) -> str | None:
+    """Nome do paciente a partir do mapa carregado em lote (None se ausente)."""
+    paciente_info = pacientes.get(paciente_id)
+    return paciente_info.get("nome") if paciente_info else None
 
 
 def registrar_procedimentos(
@@ -92,7 +114,8 @@ def registrar_procedimentos(
     if atendimento.status != "Agendado":
         raise ValueError("Somente atendimentos agendados podem receber procedimentos.")
 
-    atualizado = registrar_procedimentos_sync(
+    # Procedimentos + status do paciente em uma única transação
+    atualizado = registrar_procedimentos_e_concluir_sync(
         atendimento_id,
         procedimentos_realizados.strip(),
         observacoes.strip() if observacoes and observacoes.strip() else None,
@@ -101,11 +124,7 @@ def registrar_procedimentos(
     if atualizado is None:
         raise RuntimeError("Falha ao registrar procedimentos para o atendimento informado.")
 
-    if atualizado.paciente_id is not None:
-        update_patient_sync(
-            patient_id=atualizado.paciente_id,
-            status_atendimento="Atendimento Concluído"
-        )
+    _cache_realizados.pop(atualizado.aluno_id)
 
     return {
         "id": atualizado.id,
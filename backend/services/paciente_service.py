@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import asyncio
 from datetime import date, datetime
-from sqlalchemy import select, or_
+from typing import Awaitable, Callable, TypeVar
+from sqlalchemy import select, exists, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models import Paciente, UsuarioSistema
 from ..db.database import AsyncSessionLocal
+from ..db.runner import run_async
+
+T = TypeVar("T")
 
 
 # ============= Funções Assíncronas Originais =============
@@ -18,13 +21,9 @@ async def get_patient_by_cpf(db: AsyncSession, cpf: str) -> Paciente | None:
 
 
 async def check_cpf_exists_in_system(db: AsyncSession, cpf: str) -> bool:
-    patient_stmt = select(Paciente.id).where(Paciente.cpf == cpf)
-    patient_result = await db.execute(patient_stmt)
-    
-    if patient_result.scalar_one_or_none():
-        return True
-    
-    return False
+    # SELECT EXISTS(...): o banco responde um booleano sem materializar a linha
+    stmt = select(exists().where(Paciente.cpf == cpf))
+    return bool((await db.execute(stmt)).scalar())
 
 
 async def create_patient_async(db: AsyncSession, nome: str, cpf: str, data_nascimento: date) -> Paciente:
@@ -62,52 +61,22 @@ async def list_patients_in_triage_async(db: AsyncSession, skip: int = 0, limit:
 
 # ============= Funções Síncronas =============
 
-def _run_async(coro):
-    """Helper para condições de corrida assíncronas de forma síncrona."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-    
-    if loop.is_running():
-        # Se já existe um loop rodando, usa thread
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(asyncio.run, coro)
-            return future.result()
-    else:
-        return loop.run_until_complete(coro)
-
-
-async def _create_patient_internal(nome: str, cpf: str, data_nascimento: date) -> Paciente:
-    """Função interna para criar paciente."""
-    async with AsyncSessionLocal() as db:
-        return await create_patient_async(db, nome, cpf, data_nascimento)
-
-
-async def _list_patients_internal(skip: int = 0, limit: int = 50) -> list[Paciente]:
-    """Função interna para listar pacientes."""
-    async with AsyncSessionLocal() as db:
-        return await list_patients_in_triage_async(db, skip, limit)
-
-
-async def _check_cpf_internal(cpf: str) -> bool:
-    """Função interna para verificar CPF."""
+async def _run_in_session(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Executa uma unidade de trabalho dentro de uma única sessão do banco."""
     async with AsyncSessionLocal() as db:
-        return await check_cpf_exists_in_system(db, cpf)
+        return await fn(db)
 
 
 def create_patient(nome: str, cpf: str, data_nascimento: date) -> Paciente:
     """Cria um paciente no banco de dados (versão síncrona)."""
-    return _run_async(_create_patient_internal(nome, cpf, data_nascimento))
+    return run_async(_run_in_session(lambda db: create_patient_async(db, nome, cpf, data_nascimento)))
 
 
 def list_patients_in_triage(skip: int = 0, limit: int = 50) -> list[Paciente]:
     """Lista pacientes aguardando triagem (versão síncrona)."""
-    return _run_async(_list_patients_internal(skip, limit))
+    return run_async(_run_in_session(lambda db: list_patients_in_triage_async(db, skip, limit)))
 
 
 def check_cpf_exists(cpf: str) -> bool:
     """Verifica se CPF já existe no sistema (versão síncrona)."""
-    return _run_async(_check_cpf_internal(cpf))
\ No newline at end of file
+    return run_async(_run_in_session(lambda db: check_cpf_exists_in_system(db, cpf)))
\ No newline at end of file
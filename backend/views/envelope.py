@@ -1,9 +1,11 @@
 from typing import Any, Optional
 
 def envelope(sucesso: bool, dados: Any, erro: Optional[str] = None, meta: Optional[dict] = None):
-    body = {"success": sucesso, "data": dados}
-    if erro is not None:
-        body["error"] = erro
-    if meta is not None:
-        body["meta"] = meta
-    return body
+    # Cada combinação de chaves é montada por um único literal de dicionário
+    if erro is None:
+        if meta is None:
+            return {"success": sucesso, "data": dados}
+        return {"success": sucesso, "data": dados, "meta": meta}
+    if meta is None:
+        return {"success": sucesso, "data": dados, "error": erro}
+    return {"success": sucesso, "data": dados, "error": erro, "meta": meta}
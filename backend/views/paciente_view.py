@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime, date
 import re
 
 
+_CPF_STRIP = re.compile(r'[^0-9]')
+_NOME_RE = re.compile(r'^[a-zA-ZÀ-ÿ\s]+$')
+
+
 class PacienteBase(BaseModel):
+    # Espaços das bordas removidos no próprio pydantic-core, antes dos validadores Python
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     nome: str = Field(..., min_length=2, max_length=120, description="Nome completo do paciente")
     cpf: str = Field(..., description="CPF do paciente")
     dataNascimento: date = Field(..., description="Data de nascimento do paciente")
@@ -13,34 +20,34 @@ class PacienteBase(BaseModel):
     @field_validator('cpf')
     @classmethod
     def validate_cpf(cls, v: str) -> str:
-        cpf = re.sub(r'[^0-9]', '', v)
+        cpf = _CPF_STRIP.sub('', v)
         
         if len(cpf) != 11:
             raise ValueError('CPF deve ter 11 dígitos')
         
-        if cpf == cpf[0] * 11:
-            raise ValueError('CPF inválido')
+        # Dígitos convertidos uma única vez (ASCII '0' == 48)
+        d = bytes(c - 48 for c in cpf.encode('ascii'))
         
-        def calculate_digit(cpf_partial: str, weights: list[int]) -> int:
-            total = sum(int(digit) * weight for digit, weight in zip(cpf_partial, weights))
-            remainder = total % 11
-            return 0 if remainder < 2 else 11 - remainder
+        if len(set(d)) == 1:
+            raise ValueError('CPF inválido')
         
-        first_digit = calculate_digit(cpf[:9], list(range(10, 1, -1)))
-        second_digit = calculate_digit(cpf[:10], list(range(11, 1, -1)))
+        soma1 = d[0]*10 + d[1]*9 + d[2]*8 + d[3]*7 + d[4]*6 + d[5]*5 + d[6]*4 + d[7]*3 + d[8]*2
+        soma2 = d[0]*11 + d[1]*10 + d[2]*9 + d[3]*8 + d[4]*7 + d[5]*6 + d[6]*5 + d[7]*4 + d[8]*3 + d[9]*2
+        # Resto < 2 gera dígito 0; caso contrário 11 - resto (equivale a (10 * soma % 11) % 10)
+        first_digit = soma1 * 10 % 11 % 10
+        second_digit = soma2 * 10 % 11 % 10
         
-        if cpf[9] != str(first_digit) or cpf[10] != str(second_digit):
+        if d[9] != first_digit or d[10] != second_digit:
             raise ValueError('CPF inválido')
         
         return cpf
 
     @field_validator('nome')
     @classmethod
-    def validate_nome(cls, v: str) -> str:
-        nome = v.strip()
+    def validate_nome(cls, nome: str) -> str:
         if not nome:
             raise ValueError('Nome não pode ser vazio')
-        if not re.match(r'^[a-zA-ZÀ-ÿ\s]+$', nome):
+        if not _NOME_RE.match(nome):
             raise ValueError('Nome deve conter apenas letras e espaços')
         return nome.title()
 
@@ -55,6 +62,4 @@ class Paciente(PacienteBase):
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
-    model_config = {
-        "from_attributes": True,
-    }
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from datetime import datetime
 from enum import Enum
 
@@ -13,6 +13,8 @@ class PerfilUsuario(str, Enum):
 
 
 class UsuarioBase(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     nome: str
     email: EmailStr
     perfil: PerfilUsuario
@@ -23,6 +25,8 @@ class UsuarioCreate(UsuarioBase):
 
 
 class UsuarioUpdate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
     nome: str | None = None
     email: EmailStr | None = None
     perfil: PerfilUsuario | None = None
@@ -37,6 +41,4 @@ class Usuario(BaseModel):
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
-    model_config = {
-        "from_attributes": True,
-    }
+    model_config = ConfigDict(from_attributes=True)
@@ -7,18 +7,30 @@ from __future__ import annotations
 
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
-from typing import Optional, Callable
-from tkcalendar import Calendar  # pip install tkcalendar
+from typing import TYPE_CHECKING, Optional, Callable
 
 # Adiciona o backend ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-# Imports do backend - padrão MVC
-from backend.controllers.agendamento_controller import AgendamentoController
-from backend.db.init_db import create_tables_sync
+# tkcalendar e o controller (backend) são importados sob demanda, ao abrir o modal
+if TYPE_CHECKING:
+    from tkcalendar import Calendar
+
+
+# Cliques seguidos no calendário dentro desta janela viram uma única consulta
+DEBOUNCE_CALENDARIO_MS = 150
+# Intervalo de verificação das consultas executadas em segundo plano
+INTERVALO_VERIFICACAO_MS = 20
+# Validade (segundos) dos horários já consultados para uma data
+TTL_CACHE_HORARIOS = 30
+
+# Threads reaproveitadas entre consultas (evita criar uma thread por chamada)
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agendamento-view")
 
 
 class TelaAgendarAtendimento:
@@ -43,12 +55,7 @@ class TelaAgendarAtendimento:
             paciente_id: ID do paciente a ser atendido
             aluno_id: ID do aluno que realizará o atendimento
         """
-        # Garantir que as tabelas existem
-        try:
-            create_tables_sync()
-        except Exception:
-            pass  # Tabelas já existem
-        
+        # As tabelas são criadas na inicialização da aplicação (ver main / TelaAluno)
         self.window = tk.Toplevel(parent)
         self.window.title("Agendar Novo Atendimento")
         self.window.geometry("600x700")
@@ -61,9 +68,13 @@ class TelaAgendarAtendimento:
         
         # Widgets
         self.data_selecionada: Optional[date] = None
+        self._data_str: Optional[str] = None  # data selecionada já no formato DD/MM/AAAA
         self.horario_combo: Optional[ttk.Combobox] = None
         self.status_label: Optional[ttk.Label] = None
         self.calendar: Optional[Calendar] = None
+        self._debounce_id: Optional[str] = None
+        self._consulta_horarios = 0  # identifica a consulta de horários mais recente
+        self._horario_cache: dict[tuple[str, int], tuple[float, list[str]]] = {}
         
         # Criar interface primeiro
         self._criar_interface()
@@ -137,6 +148,8 @@ class TelaAgendarAtendimento:
         
         # Widget de calendário
         try:
+            from tkcalendar import Calendar  # pip install tkcalendar
+            
             self.calendar = Calendar(
                 data_frame,
                 selectmode='day',
@@ -149,7 +162,7 @@ class TelaAgendarAtendimento:
             self.calendar.pack(pady=10)
             
             # Bind do evento de seleção de data
-            self.calendar.bind("<<CalendarSelected>>", self._on_data_selecionada)
+            self.calendar.bind("<<CalendarSelected>>", self._agendar_data_selecionada)
         except Exception as e:
             # Fallback: Entry manual se tkcalendar não estiver disponível
             messagebox.showwarning(
@@ -229,29 +242,66 @@ class TelaAgendarAtendimento:
         style = ttk.Style()
         style.configure("Accent.TButton", font=("Segoe UI", 11, "bold"))
 
+    def _em_segundo_plano(
+        self,
+        tarefa: Callable[[], dict],
+        ao_concluir: Callable[[Optional[dict], Optional[Exception]], None],
+    ):
+        """
+        Executa a tarefa (consulta ao banco) fora da thread do Tk.
+        O resultado é entregue a ao_concluir na thread da interface, via after().
+        """
+        futuro = _EXECUTOR.submit(tarefa)
+        
+        def _verificar():
+            if not self.window.winfo_exists():
+                return  # Janela fechada antes do fim da consulta
+            if not futuro.done():
+                self.window.after(INTERVALO_VERIFICACAO_MS, _verificar)
+                return
+            erro = futuro.exception()
+            ao_concluir(None if erro else futuro.result(), erro)
+        
+        self.window.after(INTERVALO_VERIFICACAO_MS, _verificar)
+
     def _carregar_dados_paciente(self):
-        """Carrega e exibe os dados do paciente via Controller."""
-        try:
-            resultado = AgendamentoController.obter_dados_paciente(self.paciente_id)
-            
-            if resultado["success"]:
-                self.paciente_dados = resultado["data"]
-                self.paciente_nome_label.config(text=self.paciente_dados["nome"])
-                self.paciente_cpf_label.config(text=self.paciente_dados["cpf"])
-            else:
-                messagebox.showerror("Erro", resultado["message"])
-                self.window.destroy()
+        """Carrega e exibe os dados do paciente via Controller (em segundo plano)."""
+        from backend.controllers.agendamento_controller import AgendamentoController
         
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar dados do paciente:\n{str(e)}")
+        self._em_segundo_plano(
+            lambda: AgendamentoController.obter_dados_paciente(self.paciente_id),
+            self._aplicar_dados_paciente
+        )
+
+    def _aplicar_dados_paciente(self, resultado: Optional[dict], erro: Optional[Exception]):
+        """Exibe os dados do paciente carregados."""
+        if erro is not None:
+            messagebox.showerror("Erro", f"Erro ao carregar dados do paciente:\n{str(erro)}")
             self.window.destroy()
+            return
+        
+        if resultado["success"]:
+            self.paciente_dados = resultado["data"]
+            self.paciente_nome_label.config(text=self.paciente_dados["nome"])
+            self.paciente_cpf_label.config(text=self.paciente_dados["cpf"])
+        else:
+            messagebox.showerror("Erro", resultado["message"])
+            self.window.destroy()
+
+    def _agendar_data_selecionada(self, event=None):
+        """Agrupa cliques rápidos no calendário: só o último dispara a consulta."""
+        if self._debounce_id is not None:
+            self.window.after_cancel(self._debounce_id)
+        self._debounce_id = self.window.after(DEBOUNCE_CALENDARIO_MS, self._on_data_selecionada)
 
     def _on_data_selecionada(self, event=None):
         """Callback quando uma data é selecionada no calendário."""
+        self._debounce_id = None
         try:
             # Obter data selecionada
             data_str = self.calendar.get_date()  # Formato: dd/mm/yyyy
             self.data_selecionada = datetime.strptime(data_str, "%d/%m/%Y").date()
+            self._data_str = data_str
             
             # Atualizar status
             self.status_label.config(
@@ -270,9 +320,9 @@ class TelaAgendarAtendimento:
         try:
             data_str = self.data_entry.get().strip()
             
-            # Validar formato
-            datetime.strptime(data_str, "%d/%m/%Y")
+            # Validar formato (uma única conversão)
             self.data_selecionada = datetime.strptime(data_str, "%d/%m/%Y").date()
+            self._data_str = data_str
             
             # Atualizar status
             self.status_label.config(
@@ -287,38 +337,77 @@ class TelaAgendarAtendimento:
             messagebox.showerror("Erro", "Data inválida. Use o formato DD/MM/AAAA.")
 
     def _carregar_horarios(self, data_str: str):
-        """Carrega horários disponíveis via Controller."""
-        try:
-            # Passar o aluno_id para filtrar horários já ocupados
-            resultado = AgendamentoController.listar_horarios_disponiveis(data_str, self.aluno_id)
+        """Carrega horários disponíveis via Controller (em segundo plano)."""
+        from backend.controllers.agendamento_controller import AgendamentoController
+        
+        self._consulta_horarios += 1
+        consulta = self._consulta_horarios
+        chave = (data_str, self.aluno_id)
+        
+        # Data consultada há pouco: reaproveita os horários sem ir ao banco
+        em_cache = self._horario_cache.get(chave)
+        if em_cache is not None:
+            if time.monotonic() - em_cache[0] < TTL_CACHE_HORARIOS:
+                self._aplicar_horarios(consulta, {"success": True, "data": em_cache[1]}, None)
+                return
+            del self._horario_cache[chave]
+        
+        # Evita confirmar um horário da data anterior enquanto a consulta roda
+        self.horario_combo['values'] = []
+        self.horario_combo.set("")
+        
+        # Passar aluno_id e paciente_id para filtrar horários já ocupados
+        self._em_segundo_plano(
+            lambda: AgendamentoController.listar_horarios_disponiveis(
+                data_str, self.aluno_id, self.paciente_id
+            ),
+            lambda resultado, erro: self._aplicar_horarios(consulta, resultado, erro, chave)
+        )
+
+    def _aplicar_horarios(
+        self,
+        consulta: int,
+        resultado: Optional[dict],
+        erro: Optional[Exception],
+        chave: Optional[tuple[str, int]] = None,
+    ):
+        """Preenche o combo de horários com o resultado da consulta mais recente."""
+        if erro is None and chave is not None and resultado["success"]:
+            self._horario_cache[chave] = (time.monotonic(), list(resultado["data"]))
+        
+        if consulta != self._consulta_horarios:
+            return  # Outra data foi selecionada enquanto esta consulta rodava
+        
+        if erro is not None:
+            messagebox.showerror("Erro", f"Erro ao carregar horários:\n{str(erro)}")
+            return
+        
+        if resultado["success"]:
+            horarios = resultado["data"]
+            self.horario_combo['values'] = horarios
             
-            if resultado["success"]:
-                horarios = resultado["data"]
-                self.horario_combo['values'] = horarios
-                
-                if horarios:
-                    self.horario_combo.current(0)  # Selecionar primeiro horário
-                    self.status_label.config(
-                        text=f"{len(horarios)} horários disponíveis. Selecione um horário.",
-                        foreground="green"
-                    )
-                else:
-                    self.status_label.config(
-                        text="Nenhum horário disponível para esta data.",
-                        foreground="red"
-                    )
+            if horarios:
+                self.horario_combo.current(0)  # Selecionar primeiro horário
+                self.status_label.config(
+                    text=f"{len(horarios)} horários disponíveis. Selecione um horário.",
+                    foreground="green"
+                )
             else:
-                self.horario_combo['values'] = []
                 self.status_label.config(
-                    text=resultado["message"],
+                    text="Nenhum horário disponível para esta data.",
                     foreground="red"
                 )
-        
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao carregar horários:\n{str(e)}")
+        else:
+            self.horario_combo['values'] = []
+            self.status_label.config(
+                text=resultado["message"],
+                foreground="red"
+            )
 
     def _confirmar_agendamento(self):
         """Confirma o agendamento e chama o Controller."""
+        from backend.controllers.agendamento_controller import AgendamentoController
+        
         try:
             # Validar seleções
             if not self.data_selecionada:
@@ -330,8 +419,8 @@ class TelaAgendarAtendimento:
                 messagebox.showwarning("Atenção", "Por favor, selecione um horário.")
                 return
             
-            # Preparar dados
-            data_str = self.data_selecionada.strftime("%d/%m/%Y")
+            # Preparar dados (string guardada no momento da seleção)
+            data_str = self._data_str
             
             dados = {
                 "paciente_id": self.paciente_id,
@@ -353,6 +442,8 @@ class TelaAgendarAtendimento:
             
             # Chamar Controller
             resultado = AgendamentoController.agendar_novo_atendimento(dados)
+            # A ocupação desta data mudou (ou estava desatualizada): descarta o cache
+            self._horario_cache.pop((data_str, self.aluno_id), None)
             
             if resultado["success"]:
                 # Sucesso: exibir mensagem e fechar janela
@@ -392,6 +483,10 @@ class TelaAgendarAtendimento:
 
 def main():
     """Função principal para teste standalone."""
+    from backend.db.init_db import create_tables_sync
+    
+    create_tables_sync()  # Uma única vez, na inicialização
+    
     root = tk.Tk()
     root.withdraw()  # Esconder janela principal
     
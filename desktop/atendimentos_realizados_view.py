@@ -5,18 +5,19 @@ Tela para visualizar atendimentos já realizados por um aluno.
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional, List, Dict, Any
-import sys
-import os
 
-# Garantir acesso ao backend quando executado via desktop
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from backend.controllers.atendimento_controller import AtendimentoController  # noqa: E402
+# Sem ajuste de sys.path aqui: quem importar esta tela já precisa ter a raiz do projeto no caminho
+from backend.controllers.atendimento_controller import AtendimentoController
+from desktop.treeview_janela import TreeviewJanela
 
 
 FONT_FAMILY = "Segoe UI"
 HEADER_FONT = (FONT_FAMILY, 14, "bold")
 LABEL_BOLD_FONT = (FONT_FAMILY, 10, "bold")
+# Linhas visíveis da lista; só essa janela do histórico fica inserida no Treeview
+LINHAS_VISIVEIS = 6
+# Espera antes de exibir os detalhes; teclas repetidas geram uma única atualização
+DEBOUNCE_SELECAO_MS = 30
 
 
 class TelaAtendimentosRealizados:
@@ -34,13 +35,18 @@ class TelaAtendimentosRealizados:
         self.tree: Optional[ttk.Treeview] = None
         self.label_status: Optional[ttk.Label] = None
         self.label_paciente: Optional[ttk.Label] = None
-        self.procedimentos_text: Optional[tk.Text] = None
-        self.observacoes_text: Optional[tk.Text] = None
+        self.procedimentos_label: Optional[ttk.Label] = None
+        self.observacoes_label: Optional[ttk.Label] = None
+        self.scrollbar: Optional[ttk.Scrollbar] = None
+        self._janela: Optional[TreeviewJanela] = None
         self.atendimentos: List[Dict[str, Any]] = []
+        self._select_after_id: Optional[str] = None
 
         self._criar_interface()
         self._centralizar_janela(740, 560)
-        self._carregar_atendimentos()
+        # A janela é desenhada antes da consulta; a lista chega logo em seguida
+        self.tree.insert("", "end", iid="carregando", values=("", "Carregando...", "", ""))
+        self.window.after(10, self._carregar_atendimentos)
 
         master_for_transient = parent if isinstance(parent, (tk.Tk, tk.Toplevel)) else None
         if master_for_transient is not None:
@@ -74,18 +80,16 @@ class TelaAtendimentosRealizados:
         tree_frame = ttk.Frame(lista_frame)
         tree_frame.pack(fill="both", expand=True)
 
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side="right", fill="y")
+        # A barra de rolagem percorre a lista completa; o Treeview recebe apenas a janela visível
+        self.scrollbar = ttk.Scrollbar(tree_frame)
+        self.scrollbar.pack(side="right", fill="y")
 
         self.tree = ttk.Treeview(
             tree_frame,
             columns=("id", "data", "tipo", "paciente"),
             show="headings",
-            height=6,
-            yscrollcommand=scrollbar.set,
             selectmode="browse",
         )
-        scrollbar.config(command=self.tree.yview)
 
         self.tree.heading("id", text="ID")
         self.tree.heading("data", text="Data/Hora")
@@ -98,7 +102,13 @@ class TelaAtendimentosRealizados:
         self.tree.column("paciente", width=240)
 
         self.tree.pack(fill="both", expand=True)
-        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self._janela = TreeviewJanela(
+            self.tree,
+            self.scrollbar,
+            LINHAS_VISIVEIS,
+            valores=self._valores_linha,
+            ao_selecionar=self._on_tree_select,
+        )
 
         detalhes_frame = ttk.LabelFrame(main_frame, text="Detalhes do atendimento", padding="10")
         detalhes_frame.pack(fill="both", expand=True)
@@ -115,12 +125,13 @@ class TelaAtendimentosRealizados:
         self.label_status.grid(row=1, column=1, sticky="w", pady=(4, 0))
 
         ttk.Label(detalhes_frame, text="Procedimentos realizados", font=LABEL_BOLD_FONT).pack(anchor="w")
-        self.procedimentos_text = tk.Text(detalhes_frame, height=6, wrap="word", state=tk.DISABLED)
-        self.procedimentos_text.pack(fill="both", expand=True, pady=(2, 8))
+        # Campos somente leitura: Label com quebra de linha em vez de Text
+        self.procedimentos_label = ttk.Label(detalhes_frame, text="-", wraplength=680, justify="left", anchor="nw")
+        self.procedimentos_label.pack(fill="both", expand=True, pady=(2, 8))
 
         ttk.Label(detalhes_frame, text="Observações", font=LABEL_BOLD_FONT).pack(anchor="w")
-        self.observacoes_text = tk.Text(detalhes_frame, height=4, wrap="word", state=tk.DISABLED)
-        self.observacoes_text.pack(fill="both", expand=True, pady=(2, 0))
+        self.observacoes_label = ttk.Label(detalhes_frame, text="-", wraplength=680, justify="left", anchor="nw")
+        self.observacoes_label.pack(fill="both", expand=True, pady=(2, 0))
 
         botoes_frame = ttk.Frame(main_frame)
         botoes_frame.pack(fill="x", pady=(12, 0))
@@ -130,6 +141,8 @@ class TelaAtendimentosRealizados:
 
     def _carregar_atendimentos(self) -> None:
         resposta = AtendimentoController.listar_atendimentos_realizados(self.aluno_id)
+        if self.tree and self.tree.exists("carregando"):
+            self.tree.delete("carregando")
         if not resposta.get("success"):
             messagebox.showerror("Erro", resposta.get("message", "Erro desconhecido ao carregar atendimentos."))
             return
@@ -144,42 +157,35 @@ class TelaAtendimentosRealizados:
         self._popular_tree()
 
     def _popular_tree(self) -> None:
-        if not self.tree:
+        if self._janela is None:
             return
+        self._janela.selecionado_id = None
+        self._janela.definir_itens(self.atendimentos)
+
+    @staticmethod
+    def _valores_linha(atendimento: Dict[str, Any]) -> tuple:
+        return (
+            atendimento["id"],
+            atendimento.get("data_hora_formatada") or "-",
+            atendimento.get("tipo") or "-",
+            atendimento.get("paciente_nome") or "-",
+        )
 
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        for atendimento in self.atendimentos:
-            self.tree.insert(
-                "",
-                "end",
-                iid=str(atendimento["id"]),
-                values=(
-                    atendimento["id"],
-                    atendimento.get("data_hora_formatada") or "-",
-                    atendimento.get("tipo") or "-",
-                    atendimento.get("paciente_nome") or "-",
-                ),
-            )
+    def _on_tree_select(self) -> None:
+        if self._select_after_id:
+            self.window.after_cancel(self._select_after_id)
+        self._select_after_id = self.window.after(DEBOUNCE_SELECAO_MS, self._do_select)
 
-    def _on_tree_select(self, _event: tk.Event) -> None:  # pylint: disable=unused-argument
+    def _do_select(self) -> None:
+        self._select_after_id = None
         atendimento = self._obter_atendimento_selecionado()
         if atendimento is None:
             return
         self._exibir_detalhes(atendimento)
 
     def _obter_atendimento_selecionado(self) -> Optional[Dict[str, Any]]:
-        if not self.tree:
-            return None
-        selection = self.tree.selection()
-        if not selection:
-            return None
-        atendimento_id = int(selection[0])
-        for item in self.atendimentos:
-            if item.get("id") == atendimento_id:
-                return item
-        return None
+        # A janela ignora linhas fora da lista, como a linha "Carregando..."
+        return self._janela.selecionado if self._janela else None
 
     def _exibir_detalhes(self, atendimento: Dict[str, Any]) -> None:
         if self.label_paciente:
@@ -190,17 +196,14 @@ class TelaAtendimentosRealizados:
             status = str(atendimento.get("status") or "-")
             self.label_status.configure(text=status)
 
-        self._preencher_texto(self.procedimentos_text, atendimento.get("procedimentos"))
-        self._preencher_texto(self.observacoes_text, atendimento.get("observacoes"))
+        self._preencher_texto(self.procedimentos_label, atendimento.get("procedimentos"))
+        self._preencher_texto(self.observacoes_label, atendimento.get("observacoes"))
 
-    def _preencher_texto(self, widget: Optional[tk.Text], conteudo: Optional[Any]) -> None:
+    def _preencher_texto(self, widget: Optional[ttk.Label], conteudo: Optional[Any]) -> None:
         if widget is None:
             return
-        widget.configure(state=tk.NORMAL)
-        widget.delete("1.0", tk.END)
         texto = str(conteudo).strip() if conteudo else "Nenhuma informação registrada."
-        widget.insert(tk.END, texto)
-        widget.configure(state=tk.DISABLED)
+        widget.configure(text=texto)
 
 
 __all__ = ["TelaAtendimentosRealizados"]
@@ -23,7 +23,7 @@ class ConflictError(BackendError):
 
 
 # ===================== Models ===================== #
-@dataclass
+@dataclass(slots=True)
 class Paciente:
     id: Optional[int] = None
     nome: str = ""
@@ -13,6 +13,8 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from backend.controllers.usuario_controller_desktop import UsuarioController
+from backend.core.cache import CacheTTL
+from desktop.treeview_janela import TreeviewJanela
 
 # Tipos de usuário disponíveis
 TIPOS_USUARIO = {
@@ -22,6 +24,22 @@ TIPOS_USUARIO = {
     "aluno": "Aluno"
 }
 
+# Lista completa de usuários reaproveitada por 30s (busca, detalhes); as funções que
+# alteram usuários descartam a entrada para a próxima leitura ir ao banco
+_cache_lista_usuarios = CacheTTL(maxsize=1, ttl=30)
+_CHAVE_LISTA = "todos"
+
+
+# Espera após a última tecla antes de refazer a busca
+DEBOUNCE_BUSCA_MS = 250
+# Linhas visíveis da tabela; só essa janela do resultado fica inserida no Treeview
+LINHAS_VISIVEIS = 15
+
+
+def _invalidar_cache_usuarios() -> None:
+    """Descarta a lista de usuários em cache."""
+    _cache_lista_usuarios.pop(_CHAVE_LISTA)
+
 
 # ===================== Funções de Alto Nível (Desktop) ===================== #
 
@@ -33,16 +51,21 @@ def init_db_and_seed():
 
 
 def list_users() -> List[dict]:
-    """Lista todos os usuários do banco."""
+    """Lista todos os usuários do banco (em cache por 30s)."""
+    usuarios = _cache_lista_usuarios.get(_CHAVE_LISTA)
+    if usuarios is not None:
+        return usuarios
     result = UsuarioController.list_users()
     if not result["success"]:
         raise Exception(result["message"])
+    _cache_lista_usuarios.set(_CHAVE_LISTA, result["data"])
     return result["data"]
 
 
 def create_user(nome: str, email: str, cpf: str, senha: str, tipo_usuario: str, **kwargs) -> dict:
     """Cria um novo usuário."""
     result = UsuarioController.create_user(nome, email, cpf, senha, tipo_usuario, **kwargs)
+    _invalidar_cache_usuarios()
     if not result["success"]:
         raise Exception(result["message"])
     return result["data"]
@@ -67,6 +90,7 @@ def get_user_detail(user_id: int) -> dict:
 def update_user_data(user_id: int, nome: str, email: str, tipo_usuario: str, **kwargs) -> dict:
     """Atualiza dados do usuário."""
     result = UsuarioController.update_user(user_id, nome=nome, email=email, tipo_usuario=tipo_usuario, **kwargs)
+    _invalidar_cache_usuarios()
     if not result["success"]:
         raise Exception(result["message"])
     return result["data"]
@@ -75,6 +99,7 @@ def update_user_data(user_id: int, nome: str, email: str, tipo_usuario: str, **k
 def delete_user_data(user_id: int) -> bool:
     """Remove usuário."""
     result = UsuarioController.delete_user(user_id)
+    _invalidar_cache_usuarios()
     if not result["success"]:
         raise Exception(result["message"])
     return True
@@ -83,6 +108,7 @@ def delete_user_data(user_id: int) -> bool:
 def set_user_status(user_id: int, ativo: bool) -> dict:
     """Ativa/desativa usuário."""
     result = UsuarioController.set_user_status(user_id, ativo)
+    _invalidar_cache_usuarios()
     if not result["success"]:
         raise Exception(result["message"])
     return result["data"]
@@ -91,6 +117,7 @@ def set_user_status(user_id: int, ativo: bool) -> dict:
 def change_password(user_id: int, nova_senha: str) -> dict:
     """Altera senha do usuário."""
     result = UsuarioController.change_password(user_id, nova_senha)
+    _invalidar_cache_usuarios()
     if not result["success"]:
         raise Exception(result["message"])
     return result["data"]
@@ -110,13 +137,22 @@ class TelaGerenciamentoUsuarios:
         self.var_busca = tk.StringVar()
         self.var_filtro_tipo_usuario = tk.StringVar(value="Todos")
         self.var_filtro_status = tk.StringVar(value="Todos")
+        self._search_after_id = None
+        # Lista completa carregada do banco; a busca filtra sobre ela sem consultar o controller
+        self._all_users: list[dict] = []
+        # (usuário, nome, email) em minúsculas; mantido à parte para não alterar os dicts em cache
+        self._chaves_busca: list[tuple[dict, str, str]] = []
+        # Linhas atualmente na tabela: id do usuário -> iid e valores exibidos
+        self._row_iid_by_id: dict[int, str] = {}
+        self._valores_por_id: dict[int, tuple] = {}
+        self._termo_exibido = ""
 
         # Criar interface
         self._criar_widgets()
         
         # Inicializar banco e carregar dados
         self._inicializar_db()
-        self._acao_buscar()
+        self._recarregar_usuarios()
 
     def _inicializar_db(self):
         """Inicializa o banco de dados."""
@@ -156,7 +192,7 @@ class TelaGerenciamentoUsuarios:
         ttk.Label(frame_busca, text="🔍 Buscar:").grid(row=0, column=0, padx=(0, 5))
         entry_busca = ttk.Entry(frame_busca, textvariable=self.var_busca, width=30)
         entry_busca.grid(row=0, column=1, padx=(0, 10))
-        entry_busca.bind('<KeyRelease>', lambda e: self._acao_buscar())
+        entry_busca.bind('<KeyRelease>', self._schedule_buscar)
         
         btn_buscar = ttk.Button(frame_busca, text="Buscar", command=self._acao_buscar)
         btn_buscar.grid(row=0, column=2, padx=(0, 10))
@@ -169,7 +205,7 @@ class TelaGerenciamentoUsuarios:
         
         # Configurar colunas
         colunas = ("ID", "Nome", "Email", "CPF", "Tipo", "Matrícula", "Status")
-        self.tree = ttk.Treeview(frame_tabela, columns=colunas, show="headings", height=15)
+        self.tree = ttk.Treeview(frame_tabela, columns=colunas, show="headings", selectmode="browse")
         
         # Configurar cabeçalhos
         self.tree.heading("ID", text="ID")
@@ -189,13 +225,14 @@ class TelaGerenciamentoUsuarios:
         self.tree.column("Matrícula", width=100, anchor=tk.CENTER)
         self.tree.column("Status", width=80, anchor=tk.CENTER)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame_tabela, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar: percorre o resultado completo; o Treeview recebe apenas a janela visível
+        self.scrollbar = ttk.Scrollbar(frame_tabela, orient=tk.VERTICAL)
+        self._janela = TreeviewJanela(self.tree, self.scrollbar, LINHAS_VISIVEIS,
+                                      valores=self._valores_linha, aplicar_linhas=self._aplicar_linhas)
         
         # Pack widgets
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
         # Configurar redimensionamento
         frame_tabela.columnconfigure(0, weight=1)
@@ -224,20 +261,38 @@ class TelaGerenciamentoUsuarios:
         self.lbl_status = ttk.Label(frame_botoes, text="", foreground="green")
         self.lbl_status.pack(side=tk.RIGHT, padx=(5, 0))
 
-    def _acao_buscar(self):
-        """Busca e atualiza lista de usuários."""
+    def _schedule_buscar(self, event=None):
+        """Agenda a busca; teclas digitadas em sequência disparam uma única busca."""
+        if self._search_after_id:
+            self.master.after_cancel(self._search_after_id)
+        self._search_after_id = self.master.after(DEBOUNCE_BUSCA_MS, self._acao_buscar)
+
+    def _recarregar_usuarios(self):
+        """Carrega a lista completa de usuários e reaplica a busca."""
         try:
-            usuarios = list_users()
-            
-            # Aplicar filtros
-            termo = self.var_busca.get().strip().lower()
-            if termo:
-                usuarios = [u for u in usuarios if termo in u["nome"].lower() or termo in u["email"].lower()]
-            
-            self._atualizar_tabela(usuarios)
-            
+            self._definir_usuarios(list_users())
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao buscar usuários: {e}")
+            return
+        self._acao_buscar()
+
+    def _definir_usuarios(self, usuarios):
+        """Guarda a lista completa, com as chaves de busca em minúsculas calculadas uma vez."""
+        self._all_users = usuarios
+        self._chaves_busca = [(u, u["nome"].lower(), u["email"].lower()) for u in usuarios]
+
+    def _acao_buscar(self):
+        """Filtra a lista carregada pelo termo de busca e atualiza a tabela."""
+        self._search_after_id = None
+        termo = self.var_busca.get().strip().lower()
+        usuarios = self._all_users
+        if termo:
+            usuarios = [u for u, nome_lc, email_lc in self._chaves_busca
+                        if termo in nome_lc or termo in email_lc]
+        # Novo termo volta ao topo; recargas com o mesmo termo mantêm a posição
+        manter_posicao = termo == self._termo_exibido
+        self._termo_exibido = termo
+        self._atualizar_tabela(usuarios, manter_posicao=manter_posicao)
 
     def _atualizar_lista(self):
         """Atualiza a lista de usuários (botão Atualizar)."""
@@ -246,7 +301,9 @@ class TelaGerenciamentoUsuarios:
             self.lbl_status.config(text="Atualizando lista...", foreground="blue")
             self.master.update()
             
-            # Recarregar dados do banco
+            # Recarregar dados do banco (ignora a lista em cache)
+            _invalidar_cache_usuarios()
+            self._definir_usuarios(list_users())
             self._acao_buscar()
             
             # Mostrar mensagem de sucesso
@@ -259,29 +316,56 @@ class TelaGerenciamentoUsuarios:
             self.lbl_status.config(text="Erro ao atualizar!", foreground="red")
             messagebox.showerror("Erro", f"Erro ao atualizar lista: {e}")
 
-    def _atualizar_tabela(self, usuarios):
-        """Atualiza tabela com lista de usuários."""
-        # Limpar tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Inserir usuários
-        for u in usuarios:
-            status = "Ativo" if u["ativo"] else "Inativo"
-            tipo_display = (TIPOS_USUARIO.get(u["tipo_usuario"], u["tipo_usuario"]) or u["tipo_usuario"]).title()
-            cpf_display = u.get("cpf", "N/A")
-            matricula_display = u.get("matricula", "N/A") if u["tipo_usuario"] == "aluno" else "-"
-            self.tree.insert("", tk.END, values=(u["id"], u["nome"], u["email"], cpf_display, tipo_display, matricula_display, status))
+    @staticmethod
+    def _valores_linha(u):
+        """Tupla de valores exibidos na tabela para um usuário."""
+        status = "Ativo" if u["ativo"] else "Inativo"
+        tipo_display = (TIPOS_USUARIO.get(u["tipo_usuario"], u["tipo_usuario"]) or u["tipo_usuario"]).title()
+        cpf_display = u.get("cpf", "N/A")
+        matricula_display = u.get("matricula", "N/A") if u["tipo_usuario"] == "aluno" else "-"
+        return (u["id"], u["nome"], u["email"], cpf_display, tipo_display, matricula_display, status)
+
+    def _atualizar_tabela(self, usuarios, manter_posicao=False):
+        """Atualiza tabela com lista de usuários (apenas a janela visível é inserida)."""
+        self._janela.definir_itens(usuarios, manter_posicao=manter_posicao)
+
+    def _aplicar_linhas(self, usuarios):
+        """Sincroniza o Treeview com as linhas informadas, alterando só as que mudaram."""
+        novos = {u["id"]: self._valores_linha(u) for u in usuarios}
+
+        # Remover linhas que saíram do resultado
+        for uid in [uid for uid in self._row_iid_by_id if uid not in novos]:
+            self.tree.delete(self._row_iid_by_id.pop(uid))
+            del self._valores_por_id[uid]
+
+        # As linhas que ficaram precisam estar na mesma ordem relativa do novo resultado;
+        # se a ordem mudou (ex.: nome editado), a tabela é remontada
+        restantes = list(self.tree.get_children())
+        esperados = [self._row_iid_by_id[u["id"]] for u in usuarios if u["id"] in self._row_iid_by_id]
+        if restantes != esperados:
+            self.tree.delete(*restantes)
+            self._row_iid_by_id.clear()
+            self._valores_por_id.clear()
+
+        # Inserir novas linhas na posição certa e atualizar valores alterados
+        for indice, u in enumerate(usuarios):
+            uid = u["id"]
+            valores = novos[uid]
+            iid = self._row_iid_by_id.get(uid)
+            if iid is None:
+                self._row_iid_by_id[uid] = self.tree.insert("", indice, iid=str(uid), values=valores)
+            elif self._valores_por_id[uid] != valores:
+                self.tree.item(iid, values=valores)
+            self._valores_por_id[uid] = valores
 
     def _get_usuario_selecionado(self):
-        """Retorna dados do usuário selecionado."""
-        selection = self.tree.selection()
-        if not selection:
+        """Retorna dados do usuário selecionado (mesmo que a linha esteja fora da janela visível)."""
+        usuario = self._janela.selecionado
+        if usuario is None:
             messagebox.showwarning("Aviso", "Selecione um usuário.")
             return None
         
-        item = selection[0]
-        values = self.tree.item(item, 'values')
+        values = self._valores_linha(usuario)
         return {
             'id': int(values[0]),
             'nome': values[1],
@@ -320,7 +404,7 @@ class TelaGerenciamentoUsuarios:
         if resposta:
             try:
                 delete_user_data(usuario_data['id'])
-                self._acao_buscar()
+                self._recarregar_usuarios()
                 messagebox.showinfo("Sucesso", "Usuário excluído.")
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao excluir: {e}")
@@ -329,7 +413,7 @@ class TelaGerenciamentoUsuarios:
         """Adiciona usuário."""
         try:
             usuario = create_user(nome, email, cpf, senha, tipo_usuario, **kwargs)
-            self._acao_buscar()
+            self._recarregar_usuarios()
             messagebox.showinfo("Sucesso", f"Usuário '{usuario['nome']}' adicionado.")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao adicionar: {e}")
@@ -338,7 +422,7 @@ class TelaGerenciamentoUsuarios:
         """Edita usuário existente."""
         try:
             usuario = update_user_data(user_id, nome, email, tipo_usuario, **kwargs)
-            self._acao_buscar()
+            self._recarregar_usuarios()
             messagebox.showinfo("Sucesso", f"Usuário '{usuario['nome']}' editado.")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao editar: {e}")
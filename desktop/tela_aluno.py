@@ -15,9 +15,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from backend.repositories.paciente_repository import list_patients_sync
 from backend.repositories.usuario_repository import list_alunos_sync
 from backend.db.init_db import create_tables_sync
-from desktop.agendamento_view import TelaAgendarAtendimento
-from desktop.registrar_procedimentos_view import TelaRegistrarProcedimentos
 from backend.controllers.atendimento_controller import AtendimentoController
+from desktop.treeview_janela import TreeviewJanela
 
 
 DEFAULT_FONT_FAMILY = "Segoe UI"
@@ -29,6 +28,10 @@ ALERTA_TITULO = "Atenção"
 DETAIL_LABEL_FONT = (DEFAULT_FONT_FAMILY, 10, "bold")
 BTN_REFRESH_LABEL = "🔄 Atualizar"
 COL_DATA_HORA = "Data/Hora"
+# Linhas visíveis da lista de concluídas; só essa janela do histórico fica inserida no Treeview
+LINHAS_VISIVEIS_CONCLUIDOS = 10
+# Espera antes de exibir os detalhes; teclas repetidas geram uma única atualização
+DEBOUNCE_SELECAO_MS = 30
 
 
 class TelaAluno:
@@ -76,6 +79,8 @@ class TelaAluno:
         self.tree_triados = None
         self.tree_agendados = None
         self.tree_concluidos = None
+        self._janela_concluidos: Optional[TreeviewJanela] = None
+        self._concluido_after_id: Optional[str] = None
         self.titulo_label = None
         self.aluno_selector = None
         self.text_procedimentos = None
@@ -402,11 +407,9 @@ class TelaAluno:
             concluidos_tree_frame,
             columns=[col for col, _, _ in concluidos_columns],
             show="headings",
-            yscrollcommand=concluidos_scroll_y.set,
             xscrollcommand=concluidos_scroll_x.set,
             selectmode="browse",
         )
-        concluidos_scroll_y.config(command=self.tree_concluidos.yview)
         concluidos_scroll_x.config(command=self.tree_concluidos.xview)
 
         for coluna, largura, anchor in concluidos_columns:
@@ -414,7 +417,14 @@ class TelaAluno:
             self.tree_concluidos.column(coluna, width=largura, anchor=anchor)
 
         self.tree_concluidos.pack(side="left", fill="both", expand=True)
-        self.tree_concluidos.bind("<<TreeviewSelect>>", self._on_concluido_selecionado)
+        # A barra vertical percorre o histórico completo; o Treeview recebe apenas a janela visível
+        self._janela_concluidos = TreeviewJanela(
+            self.tree_concluidos,
+            concluidos_scroll_y,
+            LINHAS_VISIVEIS_CONCLUIDOS,
+            valores=self._valores_atendimento,
+            ao_selecionar=self._on_concluido_selecionado,
+        )
 
         detalhes_frame = ttk.Frame(concluidos_frame)
         detalhes_frame.pack(fill="both", expand=True, pady=(10, 0))
@@ -531,19 +541,27 @@ class TelaAluno:
             messagebox.showerror("Erro", f"Erro ao carregar consultas agendadas:\n{exc}")
             self.agendamentos = []
 
+    @staticmethod
+    def _valores_atendimento(atendimento: Dict) -> tuple:
+        return (
+            atendimento.get("id"),
+            atendimento.get("data_hora_formatada") or "-",
+            atendimento.get("tipo") or "-",
+            atendimento.get("paciente_nome") or "-",
+        )
+
     def _carregar_atendimentos_concluidos(self) -> None:
         """Carrega a lista de consultas concluídas e exibe detalhes."""
-        tree_widget = self.tree_concluidos
-        if tree_widget is None:
+        janela = self._janela_concluidos
+        if janela is None:
             return
 
-        for item in tree_widget.get_children():
-            tree_widget.delete(item)
-
+        janela.selecionado_id = None
         self._limpar_detalhes_concluido()
 
         if self.aluno_id is None:
             self.atendimentos_concluidos = []
+            janela.definir_itens(self.atendimentos_concluidos)
             return
 
         try:
@@ -552,40 +570,24 @@ class TelaAluno:
                 raise RuntimeError(resposta.get("message", "Não foi possível carregar os atendimentos concluídos."))
 
             self.atendimentos_concluidos = resposta.get("data", [])
-            for atendimento in self.atendimentos_concluidos:
-                tree_widget.insert(
-                    "",
-                    "end",
-                    iid=str(atendimento.get("id")),
-                    values=(
-                        atendimento.get("id"),
-                        atendimento.get("data_hora_formatada") or "-",
-                        atendimento.get("tipo") or "-",
-                        atendimento.get("paciente_nome") or "-",
-                    ),
-                )
         except Exception as exc:  # pylint: disable=broad-except
             messagebox.showerror("Erro", f"Erro ao carregar consultas concluídas:\n{exc}")
             self.atendimentos_concluidos = []
+        janela.definir_itens(self.atendimentos_concluidos)
 
     def _limpar_detalhes_concluido(self) -> None:
         self._preencher_texto(self.text_procedimentos, "")
         self._preencher_texto(self.text_observacoes, "")
 
-    def _on_concluido_selecionado(self, _event: tk.Event) -> None:  # pylint: disable=unused-argument
-        if self.tree_concluidos is None:
-            return
-        selection = self.tree_concluidos.selection()
-        if not selection:
-            self._limpar_detalhes_concluido()
-            return
-
-        selecionado_id = int(selection[0])
-        atendimento = next(
-            (item for item in self.atendimentos_concluidos if item.get("id") == selecionado_id),
-            None,
-        )
+    def _on_concluido_selecionado(self) -> None:
+        if self._concluido_after_id:
+            self.window.after_cancel(self._concluido_after_id)
+        self._concluido_after_id = self.window.after(DEBOUNCE_SELECAO_MS, self._exibir_concluido_selecionado)
 
+    def _exibir_concluido_selecionado(self) -> None:
+        self._concluido_after_id = None
+        # Resolvido pelo id guardado na janela: vale mesmo com a linha fora da área visível
+        atendimento = self._janela_concluidos.selecionado if self._janela_concluidos else None
         if atendimento is None:
             self._limpar_detalhes_concluido()
             return
@@ -634,6 +636,9 @@ class TelaAluno:
             aluno_id = self.aluno_id
             if aluno_id is None:
                 return
+            # Importada só ao abrir a tela: não pesa na inicialização do módulo do aluno
+            from desktop.agendamento_view import TelaAgendarAtendimento
+
             TelaAgendarAtendimento(
                 self.window,
                 paciente_id,
@@ -685,6 +690,8 @@ class TelaAluno:
         aluno_id = self.aluno_id
         if aluno_id is None:
             return
+        from desktop.registrar_procedimentos_view import TelaRegistrarProcedimentos
+
         TelaRegistrarProcedimentos(
             self.window,
             aluno_id,
@@ -0,0 +1,130 @@
+"""
+Janela deslizante para Treeview - CliniSys Desktop
+Mantém inseridas no Treeview apenas as linhas visíveis de uma lista longa.
+"""
+
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+Item = Dict[str, Any]
+
+
+class TreeviewJanela:
+    """
+    Exibe em um Treeview a janela de uma lista, a partir de um deslocamento.
+
+    A barra de rolagem, a roda do mouse e as setas percorrem a lista completa; o Treeview
+    recebe apenas as linhas visíveis. O iid de cada linha é str(item["id"]) e a seleção é
+    guardada pelo id, de modo que continua valendo quando a linha sai da janela.
+    """
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        scrollbar: ttk.Scrollbar,
+        linhas_visiveis: int,
+        *,
+        valores: Callable[[Item], Sequence[Any]],
+        aplicar_linhas: Optional[Callable[[List[Item]], None]] = None,
+        ao_selecionar: Optional[Callable[[], None]] = None,
+    ):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.linhas_visiveis = linhas_visiveis
+        self._valores = valores
+        # Por padrão a janela é remontada a cada deslocamento; telas podem aplicar um diff próprio
+        self._aplicar_linhas = aplicar_linhas or self._substituir_linhas
+        self._ao_selecionar = ao_selecionar
+
+        self.itens: List[Item] = []
+        self._posicao_por_id: Dict[int, int] = {}
+        self.offset = 0
+        self.selecionado_id: Optional[int] = None
+
+        tree.configure(height=linhas_visiveis)
+        scrollbar.configure(command=self._on_scroll)
+        tree.bind("<<TreeviewSelect>>", self._on_select)
+        tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        tree.bind("<Button-4>", lambda _e: self.rolar(-1))
+        tree.bind("<Button-5>", lambda _e: self.rolar(1))
+        tree.bind("<Up>", lambda _e: self.mover_selecao(-1))
+        tree.bind("<Down>", lambda _e: self.mover_selecao(1))
+
+    @property
+    def selecionado(self) -> Optional[Item]:
+        """Item selecionado na lista atual (mesmo que fora da janela visível)."""
+        indice = self._posicao_por_id.get(self.selecionado_id)
+        return None if indice is None else self.itens[indice]
+
+    def definir_itens(self, itens: List[Item], *, manter_posicao: bool = False) -> None:
+        """Troca a lista exibida; sem manter_posicao a janela volta ao topo."""
+        self.itens = itens
+        self._posicao_por_id = {item["id"]: indice for indice, item in enumerate(itens)}
+        self.exibir(self.offset if manter_posicao else 0, forcar=True)
+
+    def exibir(self, offset: int, *, forcar: bool = False) -> None:
+        """Insere no Treeview as linhas a partir de offset."""
+        total = len(self.itens)
+        offset = max(0, min(offset, max(0, total - self.linhas_visiveis)))
+        if offset == self.offset and not forcar:
+            return
+        self.offset = offset
+        self._aplicar_linhas(self.itens[offset:offset + self.linhas_visiveis])
+
+        # Mantém a seleção quando a linha escolhida volta para a janela
+        if self.selecionado_id is not None and self.tree.exists(str(self.selecionado_id)):
+            self.tree.selection_set(str(self.selecionado_id))
+
+        if total <= self.linhas_visiveis:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(offset / total, (offset + self.linhas_visiveis) / total)
+
+    def rolar(self, linhas: int) -> str:
+        self.exibir(self.offset + linhas)
+        return "break"
+
+    def mover_selecao(self, passo: int) -> str:
+        """Setas percorrem a lista completa, deslocando a janela quando necessário."""
+        if not self.itens:
+            return "break"
+        indice = self._posicao_por_id.get(self.selecionado_id)
+        indice = 0 if indice is None else max(0, min(indice + passo, len(self.itens) - 1))
+        if indice < self.offset:
+            self.exibir(indice)
+        elif indice >= self.offset + self.linhas_visiveis:
+            self.exibir(indice - self.linhas_visiveis + 1)
+        self.selecionado_id = self.itens[indice]["id"]
+        self.tree.selection_set(str(self.selecionado_id))
+        return "break"
+
+    def _substituir_linhas(self, itens: List[Item]) -> None:
+        self.tree.delete(*self.tree.get_children())
+        insert = self.tree.insert
+        for item in itens:
+            insert("", "end", iid=str(item["id"]), values=self._valores(item))
+
+    def _on_scroll(self, acao: str, valor: str, unidade: Optional[str] = None) -> None:
+        """Comando da barra de rolagem ("moveto" fração | "scroll" n units/pages)."""
+        if acao == "moveto":
+            self.exibir(round(float(valor) * len(self.itens)))
+        elif acao == "scroll":
+            passo = self.linhas_visiveis if unidade == "pages" else 1
+            self.rolar(int(valor) * passo)
+
+    def _on_mouse_wheel(self, event: tk.Event) -> str:
+        return self.rolar(-1 if event.delta > 0 else 1)
+
+    def _on_select(self, _event: tk.Event) -> None:  # pylint: disable=unused-argument
+        selection = self.tree.selection()
+        # Linhas que não pertencem à lista (ex.: "Carregando...") não contam como seleção
+        if selection and selection[0].isdigit() and int(selection[0]) in self._posicao_por_id:
+            self.selecionado_id = int(selection[0])
+        if self._ao_selecionar is not None:
+            self._ao_selecionar()
+
+
+__all__ = ["TreeviewJanela"]
@@ -2,14 +2,45 @@
 Tela para Visualizar Fila de Triagem e Pacientes Cadastrados
 Implementada seguindo o padrão MVC do projeto
 """
+from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
 
 from backend.controllers.triagem_controller_desktop import TriagemController
 from backend.controllers.paciente_controller_desktop import PacienteController
 from desktop.triagem_view import TelaTriagem
 
+
+def _formatar_chegada(valor):
+    """
+    Data/hora de chegada -> 'DD/MM HH:MM'. 'AAAA-MM-DD HH:MM[:SS]' (ou com 'T') é formatado por
+    fatiamento; demais strings ISO (ex.: só a data) passam por fromisoformat. Outros valores
+    voltam inalterados.
+    """
+    if not isinstance(valor, str):
+        return valor
+    if (
+        len(valor) >= 16
+        and valor[4] == "-" and valor[7] == "-" and valor[10] in " T" and valor[13] == ":"
+    ):
+        return f"{valor[8:10]}/{valor[5:7]} {valor[11:16]}"
+    try:
+        return datetime.fromisoformat(valor).strftime("%d/%m %H:%M")
+    except ValueError:
+        return valor
+
+
+# Prioridade -> tag de cor do Treeview (demais valores usam "normal")
+_TAG_PRIORIDADE = {"Alta": "alta", "Média": "media", "Baixa": "baixa"}
+
+
+def _linha_triado(p):
+    """(valores, tags) da linha de um paciente triado."""
+    prioridade = p.get("prioridade", "-")
+    valores = (p["id"], p["nome"], p["cpf"], prioridade, _formatar_chegada(p.get("triagem_data", "-")))
+    return valores, (_TAG_PRIORIDADE.get(prioridade, "normal"),)
+
+
 class TelaVisualizarFilaTriagem(tk.Frame):
     def __init__(self, master):
         super().__init__(master)
@@ -102,44 +133,22 @@ class TelaVisualizarFilaTriagem(tk.Frame):
         # Carregar lista de aguardando triagem
         aguardando = TriagemController.list_fila_triagem()
         if aguardando["success"]:
-            for paciente in aguardando["data"]:
-                chegada = paciente.get("chegada", "-")
-                try:
-                    # Formatar chegada se for timestamp
-                    dt = datetime.fromisoformat(chegada)
-                    chegada = dt.strftime("%d/%m %H:%M")
-                except:
-                    pass
-
-                self.tree_aguardando.insert("", "end", values=(
-                    paciente["id"], paciente["nome"], paciente["cpf"], chegada
-                ))
+            # Valores de exibição montados em uma única passada sobre os dados do controller
+            linhas = [
+                (p["id"], p["nome"], p["cpf"], _formatar_chegada(p.get("chegada", "-")))
+                for p in aguardando["data"]
+            ]
+            insert = self.tree_aguardando.insert
+            for valores in linhas:
+                insert("", "end", values=valores)
 
         # Carregar lista de triados
         triados = TriagemController.list_pacientes_triados()
         if triados["success"]:
-            for paciente in triados["data"]:
-                chegada = paciente.get("triagem_data", "-")
-                try:
-                    # Formatar chegada se for timestamp
-                    dt = datetime.fromisoformat(chegada)
-                    chegada = dt.strftime("%d/%m %H:%M")
-                except:
-                    pass
-
-                prioridade = paciente.get("prioridade", "-")
-                tag = "normal"
-                if prioridade == "Alta":
-                    tag = "alta"
-                elif prioridade == "Média":
-                    tag = "media"
-                elif prioridade == "Baixa":
-                    tag = "baixa"
-
-                self.tree_triaged.insert("", "end", values=(
-                    paciente["id"], paciente["nome"], paciente["cpf"], 
-                    prioridade, chegada
-                ), tags=(tag,))
+            linhas_triados = [_linha_triado(p) for p in triados["data"]]
+            insert = self.tree_triaged.insert
+            for valores, tags in linhas_triados:
+                insert("", "end", values=valores, tags=tags)
 
     def _realizar_triagem(self):
         """Abre a janela de triagem para o paciente selecionado na lista de aguardando."""
@@ -17,7 +17,7 @@ from backend.db.init_db import create_tables_sync
 from backend.db.database import AsyncSessionLocal
 from backend.models.clinica import Clinica
 from backend.repositories.usuario_repository import (
-    create_user_specific_sync,
+    create_users_specific_sync,
     get_user_by_cpf_sync,
 )
 from backend.repositories.paciente_repository import (
@@ -99,32 +99,36 @@ async def ensure_clinicas() -> dict[str, int]:
 
 
 def seed_users(clinica_map: dict[str, int]) -> None:
+    # Usuários que ainda não existem são inseridos juntos, em uma única transação
+    registros = []
     for usuario in USUARIOS:
         if get_user_by_cpf_sync(usuario["cpf"]):
             continue
-        create_user_specific_sync(
-            usuario["classe"],
-            nome=usuario["nome"],
-            email=usuario["email"],
-            cpf=usuario["cpf"],
-            senha=usuario["senha"],
+        registros.append({
+            "user_class": usuario["classe"],
+            "nome": usuario["nome"],
+            "email": usuario["email"],
+            "cpf": usuario["cpf"],
+            "senha": usuario["senha"],
             **usuario["extra"],
-        )
+        })
 
     for aluno in ALUNOS:
         if get_user_by_cpf_sync(aluno["cpf"]):
             continue
-        clinica_id = clinica_map.get(aluno["clinica_codigo"])
-        create_user_specific_sync(
-            Aluno,
-            nome=aluno["nome"],
-            email=aluno["email"],
-            cpf=aluno["cpf"],
-            senha=aluno["senha"],
-            matricula=aluno["matricula"],
-            telefone=aluno["telefone"],
-            clinica_id=clinica_id,
-        )
+        registros.append({
+            "user_class": Aluno,
+            "nome": aluno["nome"],
+            "email": aluno["email"],
+            "cpf": aluno["cpf"],
+            "senha": aluno["senha"],
+            "matricula": aluno["matricula"],
+            "telefone": aluno["telefone"],
+            "clinica_id": clinica_map.get(aluno["clinica_codigo"]),
+        })
+
+    if registros:
+        create_users_specific_sync(registros)
 
 
 def seed_pacientes() -> None: